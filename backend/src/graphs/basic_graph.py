@@ -1,13 +1,13 @@
 from typing import Annotated, TypedDict
 
-from langchain.chat_models import init_chat_model
 from langchain_core.messages import BaseMessage
-from langgraph.checkpoint.memory import InMemorySaver
 from langgraph.graph import END, START, StateGraph
 from langgraph.graph.message import add_messages
+from src.shared.models import get_chat_model
+from src.shared.serialization import OffloadingSaver
 
-# Initialize the Chat Model
-model = init_chat_model("ollama:granite4:micro", temperature=0.25)
+# The Chat Model is initialized on first use
+BASIC_MODEL = "ollama:granite4:micro"
 
 
 # Define state schema
@@ -15,19 +15,36 @@ class State(TypedDict):
     messages: Annotated[list[BaseMessage], add_messages]
 
 
+def get_model():
+    """Return the chat model of the basic graph."""
+    return get_chat_model(BASIC_MODEL, temperature=0.25)
+
+
 # Define the node function
 def call_model(state: State):
+    model = get_model()
     response = model.invoke(state["messages"])
     return {"messages": [response]}
 
 
-checkpointer = InMemorySaver()
+def build_graph():
+    """Build and compile the basic chat graph."""
+    checkpointer = OffloadingSaver()
+
+    # Create and compile the graph
+    return (
+        StateGraph(State)
+        .add_node("agent", call_model)
+        .add_edge(START, "agent")
+        .add_edge("agent", END)
+        .compile(checkpointer=checkpointer)
+    )
+
+
+def __getattr__(name: str):
+    """Compile `graph` on first access (it is the entry point in langgraph.json)."""
+    if name == "graph":
+        from src.graphs.registry import get_graph
 
-# Create and compile the graph
-graph = (
-    StateGraph(State)
-    .add_node("agent", call_model)
-    .add_edge(START, "agent")
-    .add_edge("agent", END)
-    .compile(checkpointer=checkpointer)
-)
+        return get_graph("basic")
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
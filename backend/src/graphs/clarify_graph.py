@@ -1,20 +1,19 @@
 import operator
-import os
 from typing import Annotated, List, Literal, TypedDict
 
-from dotenv import load_dotenv
-from langchain.chat_models import init_chat_model
 from langchain_core.messages import (
     AIMessage,
     MessageLikeRepresentation,
 )
 from langchain_core.tools import tool
-from langgraph.checkpoint.memory import InMemorySaver
 from langgraph.graph import END, START, StateGraph
 from langgraph.types import Command, interrupt
 from pydantic import BaseModel
-
-load_dotenv()
+from src.shared.models import get_chat_model
+from src.shared.prompts import QUESTIONS_PROMPT
+from src.shared.serialization import OffloadingSaver
+from src.shared.tool_dispatch import ToolHandler, run_tool_calls
+from src.shared.tool_stream import astream_questions
 
 
 class Question(BaseModel):
@@ -47,15 +46,14 @@ def ask_questions_tool(questions: List[Question]) -> Command[Literal["answer"]]:
     return answers
 
 
-# llm = init_chat_model("google_genai:gemini-2.5-flash-lite")
-llm_model = os.environ["LLM_MODEL"]
-llm = init_chat_model(llm_model)
+# llm = get_chat_model("google_genai:gemini-2.5-flash-lite")
 
 
 async def clarify_prompt(
     state: GraphState,
 ) -> Command[Literal["tool_supervisor", "answer"]]:
     """"""
+    llm = get_chat_model()
     print("clarify state")
     messages = state.get("messages", [])
     questions_made = state.get("questions_made", False)
@@ -63,54 +61,45 @@ async def clarify_prompt(
     if questions_made:
         return Command(goto="answer")
 
-    prompt = f"""
-    Your goal is to call the tool ask_questions_tool with the right paramters.
-
-    Based on the user message, please do questions to the user that help you define the goal, context, output_format and role.
-
-    The user message is:
-    {messages}
-
-    Call the tool with the questions as an array of JSON objects.
-    questions: [
-        {{"id": "q1", "question": "question1", "options":["option1", "option2", "option3"]}},
-    ]
-
-    3 or 4 QUESTIONS, NO MORE
-
-    Never include Other in the options.
-
-    DO NOT RETURN ANYHITNG. JUST CALL THE TOOL ask_questions_tool with the right options
-  """
+    prompt = QUESTIONS_PROMPT.messages(messages=messages)
 
     tools = [ask_questions_tool]
 
     llm_with_tools = llm.bind_tools(tools)
 
     # llm_with_structured = llm.with_structured_output(QuestionsOutput)
-    response = llm_with_tools.invoke([("human", prompt)])
+    response = await astream_questions(llm_with_tools, prompt, Question)
 
     return Command(goto="tool_supervisor", update={"messages": [response]})
 
 
+TOOL_HANDLERS = {
+    "ask_questions_tool": ToolHandler(
+        ask_questions_tool, lambda args, message: args, interrupts=True
+    ),
+}
+
+
 async def tool_supervisor(state: GraphState) -> Command[Literal["answer"]]:
     """Process the tool calls from clarify_prompt and invoke the ask_questions_tool."""
     messages = state.get("messages", "")
     last_message = messages[-1]
 
-    for tool_call in last_message.tool_calls:
-        tool_args = tool_call["args"]
-
-        answers = ask_questions_tool.invoke(tool_args)
+    # Keep the answers of every tool call, not only the last one
+    all_answers = await run_tool_calls(last_message, TOOL_HANDLERS)
 
     return Command(
         goto="answer",
-        update={"messages": [AIMessage(content=answers)], "questions_made": True},
+        update={
+            "messages": [AIMessage(content=answers) for answers in all_answers],
+            "questions_made": True,
+        },
     )
 
 
 async def answer(state: GraphState) -> Command[Literal["__end__"]]:
     """"""
+    llm = get_chat_model()
 
     messages = state.get("messages", [])
 
@@ -126,14 +115,24 @@ async def answer(state: GraphState) -> Command[Literal["__end__"]]:
     return Command(goto=END, update={"messages": [res.content]})
 
 
-graph_builder = StateGraph(GraphState)
+def build_graph():
+    """Build and compile the clarification graph."""
+    graph_builder = StateGraph(GraphState)
+
+    graph_builder.add_node("clarify_prompt", clarify_prompt)
+    graph_builder.add_node("tool_supervisor", tool_supervisor)
+    graph_builder.add_node("answer", answer)
+
+    graph_builder.add_edge(START, "clarify_prompt")
 
+    checkpointer = OffloadingSaver()
+    return graph_builder.compile(checkpointer=checkpointer)
 
-graph_builder.add_node("clarify_prompt", clarify_prompt)
-graph_builder.add_node("tool_supervisor", tool_supervisor)
-graph_builder.add_node("answer", answer)
 
-graph_builder.add_edge(START, "clarify_prompt")
+def __getattr__(name: str):
+    """Compile `graph` on first access (it is the entry point in langgraph.json)."""
+    if name == "graph":
+        from src.graphs.registry import get_graph
 
-checkpointer = InMemorySaver()
-graph = graph_builder.compile(checkpointer=checkpointer)
+        return get_graph("clarify")
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,17 +1,29 @@
+import asyncio
 import os
 from typing import Literal
 
-from dotenv import load_dotenv
-from langchain.chat_models import init_chat_model
 from langchain_core.messages import AIMessage, HumanMessage, ToolCall
-from langgraph.checkpoint.memory import InMemorySaver
+from langgraph.config import get_config
 from langgraph.graph import START, StateGraph
-from langgraph.types import Command
+from langgraph.types import Command, Send
+from src.shared.models import get_chat_model
 from src.shared.prompts import (
+    AUTOIMPROVE_PROMPT,
     CLARIFY_PROMPT,
+    EVALUATE_PROMPT,
     PROMPT_TEMPLATE,
+    VARIANT_PROMPT,
 )
+from src.shared.question_cache import (
+    QUESTION_CACHE,
+    cached_questions_message,
+    question_cache_text,
+)
+from src.shared.serialization import OffloadingSaver
 from src.shared.state import GraphState
+from src.shared.tool_dispatch import ToolHandler, merge_commands, run_tool_calls
+from src.shared.tool_stream import astream_questions
+from src.shared.usage import DEFAULT_TENANT
 from src.shared.utils import (
     ask_questions_tool,
     create_prompt_tool,
@@ -21,16 +33,16 @@ from src.shared.utils import (
     test_prompt_tool,
 )
 
-load_dotenv()
-
-llm_model = os.environ["LLM_MODEL"]
-llm = init_chat_model(llm_model)
+# Number of prompt variants generated per exploration and how many are shown
+VARIANT_COUNT = int(os.environ.get("PROMPT_VARIANT_COUNT", "3"))
+VARIANT_TOP = int(os.environ.get("PROMPT_VARIANT_TOP", "3"))
 
 
 async def generate_or_improve_prompt(
     state: GraphState,
 ) -> Command[Literal["tool_supervisor"]]:
     """Create or improve a prompt depending on state."""
+    llm = get_chat_model()
     messages = state.get("messages", [])
 
     print("messages", messages)
@@ -57,7 +69,7 @@ async def generate_or_improve_prompt(
             },
         )
 
-    prompt = PROMPT_TEMPLATE.format(
+    prompt = PROMPT_TEMPLATE.messages(
         formatted_messages=formatted_messages,
         prompt=current_prompt or "",
     )
@@ -78,6 +90,42 @@ async def generate_or_improve_prompt(
     )
 
 
+TOOL_HANDLERS = {
+    "ask_questions_tool": ToolHandler(
+        ask_questions_tool,
+        lambda args, message: {
+            "questions": args["questions"],
+            "last_message": message,
+        },
+        interrupts=True,
+    ),
+    "create_prompt_tool": ToolHandler(
+        create_prompt_tool,
+        lambda args, message: {
+            "prompt": args["prompt"],
+            "last_message": message,
+            "variants": args.get("variants"),
+        },
+        interrupts=True,
+    ),
+    "test_prompt_tool": ToolHandler(
+        test_prompt_tool,
+        lambda args, message: {"result": args["result"], "last_message": message},
+        interrupts=True,
+    ),
+    "evaluate_prompt_tool": ToolHandler(
+        evaluate_prompt_tool,
+        lambda args, message: {
+            "evaluation": args["evaluation"],
+            "missing_info": args["missing_info"],
+            "tool_call_message": message,
+        },
+        interrupts=True,
+    ),
+    # suggest_improvements_tool is only shown in the FE and never invoked
+}
+
+
 async def tool_supervisor(
     state: GraphState,
 ) -> Command[
@@ -88,57 +136,25 @@ async def tool_supervisor(
         "autoimprove",
         "evaluate_prompt_node",
         "generate_or_improve_prompt",
+        "explore_variants",
         "__end__",
     ]
 ]:
-    """Process the tool calls from ask_questions_node and invoke the ask_questions_tool."""
+    """Process the tool calls of the last message through the tool handler registry."""
     messages = state.get("messages", "")
     last_message = messages[-1]
 
     print("messages length", len(messages))
 
-    for tool_call in last_message.tool_calls:
-        tool_args = tool_call["args"]
-        tool_name = tool_call["name"]
-
-        if tool_name == "ask_questions_tool":
-            return ask_questions_tool.invoke(
-                input={
-                    "questions": tool_args["questions"],
-                    "last_message": last_message,
-                }
-            )
-        elif tool_name == "create_prompt_tool":
-            return create_prompt_tool.invoke(
-                input={"prompt": tool_args["prompt"], "last_message": last_message}
-            )
-        elif tool_name == "test_prompt_tool":
-            return test_prompt_tool.invoke(
-                input={"result": tool_args["result"], "last_message": last_message}
-            )
-        # elif tool_name == "suggest_improvements_tool":
-        #     return suggest_improvements_tool.invoke(
-        #         input={
-        #             "improvements": tool_args["improvements"],
-        #             "last_message": last_message,
-        #         }
-        #     )
-        elif tool_name == "evaluate_prompt_tool":
-            return evaluate_prompt_tool.invoke(
-                input={
-                    "evaluation": tool_args["evaluation"],
-                    "missing_info": tool_args["missing_info"],
-                    "tool_call_message": last_message,
-                }
-            )
-        else:
-            raise ValueError(f"Unknown tool name: {tool_name}")
+    commands = await run_tool_calls(last_message, TOOL_HANDLERS)
+    return merge_commands(commands)
 
 
 async def ask_questions_node(
     state: GraphState,
 ) -> Command[Literal["tool_supervisor"]]:
     """"""
+    llm = get_chat_model()
     print("ask_questions_node")
     messages = state.get("messages", [])
     current_prompt = state.get("prompt", "")
@@ -156,17 +172,31 @@ async def ask_questions_node(
             f""" IDEAS TO DO THE QUESTIONS ABOUT: {missing_info_args} """
         )
 
-    prompt = CLARIFY_PROMPT.format(prompt=current_prompt, missing_info=missing_info)
+    prompt = CLARIFY_PROMPT.messages(prompt=current_prompt, missing_info=missing_info)
 
     print("############ask_questions_node##################")
     print(prompt)
     print("##############################")
 
+    # Near-identical inputs of a tenant reuse the questions of another thread
+    cache_key = question_cache_text(current_prompt, messages)
+    configurable = get_config()["configurable"]
+    tenant_id = configurable.get("tenant_id", DEFAULT_TENANT)
+    thread_id = configurable.get("thread_id")
+    questions = QUESTION_CACHE.get(cache_key, tenant_id, thread_id)
+    if questions is not None:
+        response = cached_questions_message(questions)
+        return Command(goto="tool_supervisor", update={"messages": [response]})
+
     tools = [ask_questions_tool]
 
     llm_with_tools = llm.bind_tools(tools)
 
-    response = await llm_with_tools.ainvoke([("human", prompt)])
+    response = await astream_questions(llm_with_tools, prompt)
+
+    if response.tool_calls and response.tool_calls[0]["name"] == "ask_questions_tool":
+        questions = response.tool_calls[0]["args"]["questions"]
+        QUESTION_CACHE.put(cache_key, questions, tenant_id, thread_id)
 
     return Command(goto="tool_supervisor", update={"messages": [response]})
 
@@ -176,6 +206,7 @@ async def autoimprove(
     state: GraphState,
 ) -> Command[Literal["generate_or_improve_prompt"]]:
     """Analyze prompt improvements based on past messages and what has been ignored or not properly applied."""
+    llm = get_chat_model()
     messages = state.get("messages", [])
     result = state.get("result", "")
     current_prompt = state.get("prompt", "")
@@ -197,34 +228,9 @@ async def autoimprove(
     # 2. What aspects haven't been properly applied
     # 3. How the current result falls short of expectations
     # 4. Specific improvements needed based on conversation history
-    prompt = f"""
-        You are an expert prompt analyst. Focus ONLY on addressing the specific user feedback and clear gaps between the prompt and result.
-
-        <PROMPT>
-        {current_prompt}
-        </PROMPT>
-
-        <RESULT>
-        {result}
-        </RESULT>
-
-        <FEEDBACK>
-        {feedback}
-        </FEEDBACK>
-
-        TASK: Identify improvements that directly address:
-        1. Specific issues mentioned in the user's feedback
-        2. Clear discrepancies between what the prompt asks for and what the result delivers
-        3. Missing instructions that would prevent the issues seen in the result
-
-        CONSTRAINTS:
-        - Maximum 2-3 specific improvements
-        - Each improvement must directly relate to the feedback or obvious prompt-result gaps
-        - Avoid general improvements unless the feedback explicitly mentions them
-        - Focus on actionable changes that will prevent the current issues
-
-        Call the suggest_improvements_tool with ONLY the most relevant, specific improvements.
-    """
+    prompt = AUTOIMPROVE_PROMPT.messages(
+        prompt=current_prompt, result=result, feedback=feedback
+    )
 
     tools = [suggest_improvements_tool]
     llm_with_tools = llm.bind_tools(tools)
@@ -241,6 +247,7 @@ async def autoimprove(
 # Uses just the prompt from the state
 async def test_prompt(state: GraphState) -> Command[Literal["tool_supervisor"]]:
     """Test the prompt."""
+    llm = get_chat_model()
     prompt = state.get("prompt", "")
 
     result = await llm.ainvoke(prompt.content)
@@ -265,62 +272,136 @@ async def evaluate_prompt_node(
     state: GraphState,
 ) -> Command[Literal["tool_supervisor"]]:
     """Evaluate the completeness of the current prompt and return a score from 1-6."""
+    llm = get_chat_model()
     prompt = state.get("prompt", "")
 
     print("###############EVALUATE PROMPT##################")
     print("Prompt to evaluate:", prompt)
     print("##############################")
 
-    # Create an evaluation prompt that analyzes completeness on a 1-6 scale
-    evaluation_prompt = f"""
-    You are an expert prompt analyst. Evaluate the completeness of the following prompt on a scale from 1 to 6, where:
+    evaluation_prompt = EVALUATE_PROMPT.messages(prompt=prompt)
 
-    1 - Very incomplete: Lacks basic structure, unclear goal, missing key information
-    2 - Incomplete: Has basic idea but missing important details and context
-    3 - Somewhat complete: Has main elements but lacks specificity and clarity
-    4 - Mostly complete: Good structure and details, but could use some refinement
-    5 - Very complete: Well-structured with clear instructions and good context
-    6 - Excellent: Comprehensive, specific, and ready for immediate use
+    tools = [evaluate_prompt_tool]
+    llm_with_tools = llm.bind_tools(tools)
 
-    Consider these factors in your evaluation:
-    - Clarity of the objective/goal
-    - Specificity of instructions
-    - Completeness of context and constraints
-    - Structure and organization
-    - Examples or guidelines provided
-    - Target audience/purpose definition
+    response = await llm_with_tools.ainvoke(evaluation_prompt)
 
-    <PROMPT>
-    {prompt}
-    </PROMPT>
+    return Command(goto="tool_supervisor", update={"messages": [response]})
 
-    After analyzing the prompt, you MUST call the evaluate_prompt_tool with these parameters:
-    - evaluation: int (your score from 1-6)
-    - missing_info: str (brief description of what information is missing or needs improvement)
 
-    Call the evaluate_prompt_tool with your evaluation score and missing information description.
-    """
+async def explore_variants(
+    state: GraphState,
+) -> Command[Literal["generate_variant"]]:
+    """Fan out the generation of several prompt variants in parallel."""
+    messages = state.get("messages", [])
+    current_prompt = state.get("prompt", "")
 
-    tools = [evaluate_prompt_tool]
-    llm_with_tools = llm.bind_tools(tools)
+    # Use the latest feedback rather than the tool call being answered
+    feedback = [m for m in messages if not getattr(m, "tool_calls", None)][-1:]
+    formatted_messages = get_formatted_messages(feedback)
+
+    sends = [
+        Send(
+            "generate_variant",
+            {
+                "prompt": current_prompt.content,
+                "formatted_messages": formatted_messages,
+                "variant_number": idx + 1,
+                "variant_count": VARIANT_COUNT,
+            },
+        )
+        for idx in range(VARIANT_COUNT)
+    ]
 
-    response = await llm_with_tools.ainvoke([("human", evaluation_prompt)])
+    return Command(
+        goto=sends, update={"variants": {"type": "override", "value": []}}
+    )
 
-    return Command(goto="tool_supervisor", update={"messages": [response]})
 
+async def generate_variant(variant: dict) -> dict:
+    """Generate one prompt variant, then test and evaluate it concurrently."""
+    llm = get_chat_model()
+    prompt = VARIANT_PROMPT.messages(**variant)
+
+    res = await llm.bind_tools([create_prompt_tool]).ainvoke(prompt)
+    if not res.tool_calls:
+        return {"variants": []}
+    variant_prompt = res.tool_calls[0]["args"]["prompt"]
+
+    llm_with_tools = llm.bind_tools([evaluate_prompt_tool])
+    result, evaluation = await asyncio.gather(
+        llm.ainvoke(variant_prompt),
+        llm_with_tools.ainvoke(EVALUATE_PROMPT.messages(prompt=variant_prompt)),
+    )
+
+    evaluation_args = (
+        evaluation.tool_calls[0]["args"] if evaluation.tool_calls else {}
+    )
+
+    return {
+        "variants": [
+            {
+                "prompt": variant_prompt,
+                "result": str(result.content),
+                "evaluation": int(evaluation_args.get("evaluation", 0)),
+                "missing_info": evaluation_args.get("missing_info", ""),
+            }
+        ]
+    }
+
+
+async def rank_variants(state: GraphState) -> Command[Literal["tool_supervisor"]]:
+    """Rank the evaluated variants and present the best ones to the user."""
+    current_prompt = state.get("prompt", "")
+    variants = sorted(
+        state.get("variants", []), key=lambda v: v["evaluation"], reverse=True
+    )[:VARIANT_TOP]
+
+    if not variants:
+        variants = [{"prompt": current_prompt.content, "evaluation": 0}]
+
+    best_prompt = variants[0]["prompt"]
+    tool_call = ToolCall(
+        name="create_prompt_tool",
+        args={"prompt": best_prompt, "variants": variants},
+        id="manual_variants_call_1",
+    )
+    ai_message = AIMessage(content="", tool_calls=[tool_call])
+
+    return Command(
+        goto="tool_supervisor",
+        update={
+            "messages": [ai_message],
+            "prompt": HumanMessage(content=best_prompt),
+        },
+    )
+
+
+def build_graph():
+    """Build and compile the prompt refinement graph."""
+    graph_builder = StateGraph(GraphState)  # remove update here, override prompt variable
+
+    graph_builder.add_node("ask_questions_node", ask_questions_node)
+    graph_builder.add_node("tool_supervisor", tool_supervisor)
+    graph_builder.add_node("test_prompt", test_prompt)
+    graph_builder.add_node("autoimprove", autoimprove)
+    graph_builder.add_node("evaluate_prompt_node", evaluate_prompt_node)
+    graph_builder.add_node("generate_or_improve_prompt", generate_or_improve_prompt)
+    graph_builder.add_node("explore_variants", explore_variants)
+    graph_builder.add_node("generate_variant", generate_variant)
+    graph_builder.add_node("rank_variants", rank_variants)
 
-graph_builder = StateGraph(GraphState)  # remove update here, override prompt variable
+    graph_builder.add_edge(START, "generate_or_improve_prompt")
+    graph_builder.add_edge("generate_variant", "rank_variants")
 
+    checkpointer = OffloadingSaver()
+    return graph_builder.compile(checkpointer=checkpointer)
 
-graph_builder.add_node("ask_questions_node", ask_questions_node)
-graph_builder.add_node("tool_supervisor", tool_supervisor)
-graph_builder.add_node("test_prompt", test_prompt)
-graph_builder.add_node("autoimprove", autoimprove)
-graph_builder.add_node("evaluate_prompt_node", evaluate_prompt_node)
-graph_builder.add_node("generate_or_improve_prompt", generate_or_improve_prompt)
-# graph_builder.add_node("generate_or_improve_prompt", generate_or_improve_prompt)
 
-graph_builder.add_edge(START, "generate_or_improve_prompt")
+def __getattr__(name: str):
+    """Compile `graph` on first access (it is the entry point in langgraph.json)."""
+    if name == "graph":
+        from src.graphs.registry import get_graph
 
-checkpointer = InMemorySaver()
-graph = graph_builder.compile(checkpointer=checkpointer)
+        return get_graph("main")
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,65 @@
+"""Registry that compiles graphs and their models on first use."""
+
+import importlib
+import json
+import threading
+from pathlib import Path
+
+from src.shared.models import get_chat_model
+
+LANGGRAPH_CONFIG = Path(__file__).resolve().parents[2] / "langgraph.json"
+
+
+def load_graph_modules(path: Path = LANGGRAPH_CONFIG) -> dict[str, str]:
+    """Read the graphs declared in langgraph.json.
+
+    Entries like "./src/graphs/prompt_graph.py:graph" map to the module
+    "src.graphs.prompt_graph", which must expose build_graph().
+    """
+    with open(path) as file:
+        graphs = json.load(file)["graphs"]
+
+    modules = {}
+    for name, target in graphs.items():
+        module_path = target.split(":", 1)[0].removeprefix("./").removesuffix(".py")
+        modules[name] = module_path.replace("/", ".")
+    return modules
+
+
+# Graph name (as in langgraph.json) -> module exposing build_graph()
+GRAPH_MODULES = load_graph_modules()
+
+_graphs = {}
+_lock = threading.Lock()
+
+
+def get_graph(name: str):
+    """Return the compiled graph registered under `name`, building it on first use.
+
+    Args:
+        name: Graph name, one of GRAPH_MODULES
+
+    Returns:
+        CompiledStateGraph: The compiled graph with its checkpointer
+    """
+    graph = _graphs.get(name)
+    if graph is not None:
+        return graph
+
+    with _lock:
+        if name not in _graphs:
+            module = importlib.import_module(GRAPH_MODULES[name])
+            _graphs[name] = module.build_graph()
+    return _graphs[name]
+
+
+def warm_up(names: list[str] | None = None):
+    """Compile the graphs and initialize their models ahead of the first request."""
+    for name in names or GRAPH_MODULES:
+        try:
+            get_graph(name)
+            module = importlib.import_module(GRAPH_MODULES[name])
+            # Graphs with their own model expose get_model()
+            getattr(module, "get_model", get_chat_model)()
+        except Exception as e:
+            print(f"Warm-up of graph '{name}' failed: {e}")
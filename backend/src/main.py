@@ -1,15 +1,75 @@
 """Main FastAPI application entry point."""
 
-from fastapi import FastAPI
+import asyncio
+import os
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from src.routers.chat_router import router as chat_router
-from src.routers.clarify_router import router as clarify_router
-from src.routers.prompt_router import router as prompt_router
+from fastapi.middleware.gzip import GZipMiddleware
+from src.graphs.registry import GRAPH_MODULES, get_graph, warm_up
+from src.routers.batch_router import router as batch_router
+from src.routers.graph_router import create_graph_router
+from src.routers.optimize_router import queue as optimize_queue
+from src.routers.optimize_router import router as optimize_router
+from src.routers.usage_router import router as usage_router
+from src.shared.graph_pool import GRAPH_POOLS
+from src.shared.keepalive import OllamaKeepAlive, configured_ollama_models
+from src.shared.question_cache import QUESTION_CACHE
+from src.shared.serialization import (
+    SERIALIZATION_METRICS,
+    LoopLagMonitor,
+    shutdown_serialize_executor,
+)
+from src.shared.snapshots import SNAPSHOT_PATH, SnapshotManager
+from src.shared.stream_buffer import STREAM_METRICS
+from src.shared.usage import LEDGER
+
+# Comma separated graph names to compile in the background at startup ("" disables)
+WARMUP_GRAPHS = os.environ.get("WARMUP_GRAPHS", "main,basic,clarify")
+# Smallest response body worth compressing (event streams are never compressed)
+GZIP_MINIMUM_SIZE = int(os.environ.get("GZIP_MINIMUM_SIZE", "1024"))
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Restore snapshots, warm up the graphs and models, and stop background workers."""
+    snapshots = None
+    if SNAPSHOT_PATH:
+        savers = {name: get_graph(name).checkpointer for name in GRAPH_MODULES}
+        snapshots = SnapshotManager(savers, ledger=LEDGER)
+        restored = await asyncio.to_thread(snapshots.restore)
+        print(f"Restored {restored} thread snapshots from {SNAPSHOT_PATH}")
+        snapshots.start()
+
+    names = [name for name in WARMUP_GRAPHS.split(",") if name]
+    warm_up_task = None
+    if names:
+        warm_up_task = asyncio.create_task(asyncio.to_thread(warm_up, names))
+
+    app.state.ollama_keepalive = OllamaKeepAlive(configured_ollama_models())
+    app.state.ollama_keepalive.start()
+
+    app.state.loop_lag = LoopLagMonitor()
+    app.state.loop_lag.start()
+
+    yield
+
+    if warm_up_task:
+        await warm_up_task
+    await app.state.ollama_keepalive.stop()
+    await optimize_queue.stop()
+    if snapshots:
+        await snapshots.stop()
+    await app.state.loop_lag.stop()
+    shutdown_serialize_executor()
+
 
 app = FastAPI(
     title="BleakAI API",
     description="API for prompt testing and refinement",
     version="0.1.0",
+    lifespan=lifespan,
 )
 
 app.add_middleware(
@@ -19,11 +79,14 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(GZipMiddleware, minimum_size=GZIP_MINIMUM_SIZE)
 
 # Include routers
-app.include_router(prompt_router)
-app.include_router(chat_router)
-app.include_router(clarify_router)
+for graph_name in GRAPH_MODULES:
+    app.include_router(create_graph_router(graph_name))
+app.include_router(batch_router)
+app.include_router(optimize_router)
+app.include_router(usage_router)
 
 
 @app.get("/")
@@ -36,3 +99,33 @@ async def root():
 async def health_check():
     """Health check endpoint."""
     return {"status": "healthy"}
+
+
+@app.get("/health/models")
+async def models_health_check(request: Request):
+    """Report load and eval times of the local models kept warm."""
+    return request.app.state.ollama_keepalive.stats
+
+
+@app.get("/metrics/streams")
+async def stream_metrics():
+    """Report streaming connection metrics, including queue high-water marks."""
+    return STREAM_METRICS
+
+
+@app.get("/metrics/serialization")
+async def serialization_metrics():
+    """Report offloaded serializations and the event loop lag."""
+    return SERIALIZATION_METRICS
+
+
+@app.get("/metrics/graphs")
+async def graph_metrics():
+    """Report the concurrent, queued and rejected runs of every graph."""
+    return {name: pool.metrics for name, pool in GRAPH_POOLS.items()}
+
+
+@app.get("/metrics/questions")
+async def question_cache_metrics():
+    """Report hits, misses and evictions of the clarifying question cache."""
+    return {**QUESTION_CACHE.stats, "size": len(QUESTION_CACHE)}
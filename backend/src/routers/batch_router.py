@@ -0,0 +1,40 @@
+"""Batch router for testing many prompts in one request."""
+
+import uuid
+
+from fastapi import APIRouter, Depends
+from pydantic import BaseModel, Field
+from src.shared.batch import create_ndjson_stream, run_prompt_batch
+from src.shared.models import get_chat_model
+from src.shared.usage import enforce_budget, get_tenant_id, thread_config
+
+router = APIRouter(prefix="/batch", tags=["batch"])
+
+
+class BatchInput(BaseModel):
+    """Request model for batch prompt testing."""
+
+    prompts: list[str] = Field(min_length=1)
+    samples: int = Field(default=1, ge=1, le=20)
+    max_concurrency: int | None = Field(default=None, ge=1)
+
+
+@router.post("/test")
+async def batch_test_prompts(
+    body: BatchInput, tenant_id: str = Depends(get_tenant_id)
+):
+    """Run a batch of prompts and stream the results as NDJSON in completion order."""
+    print(f"Batch testing {len(body.prompts)} prompts x {body.samples} samples")
+
+    # Usage is accounted to the tenant, under a thread per batch
+    config = thread_config(f"batch-{uuid.uuid4().hex}", tenant_id)
+    enforce_budget(config)
+
+    results = run_prompt_batch(
+        get_chat_model(),
+        body.prompts,
+        samples=body.samples,
+        max_concurrency=body.max_concurrency,
+        config=config,
+    )
+    return create_ndjson_stream(results)
@@ -0,0 +1,135 @@
+"""Generic router serving the thread endpoints of any registered graph."""
+
+from fastapi import APIRouter, Depends, Header, Query, Request, WebSocket
+from pydantic import BaseModel
+from src.graphs.registry import get_graph
+from src.shared.graph_pool import get_graph_pool
+from src.shared.idempotency import idempotent_resume
+from src.shared.state_query import query_thread_state
+from src.shared.streaming import create_graph_stream, run_graph_websocket
+from src.shared.usage import enforce_budget, get_tenant_id, thread_config
+
+# URL prefixes and tags of the graphs served before the generic router, kept for
+# existing clients. Other graphs are served under /graphs/{name}.
+GRAPH_PREFIXES = {"main": "/threads", "basic": "/basic/threads", "clarify": "/clarify/threads"}
+GRAPH_TAGS = {"main": "prompt", "basic": "chat", "clarify": "clarification"}
+# Most messages one state request may return
+MAX_STATE_PAGE_SIZE = 500
+
+
+class StreamInput(BaseModel):
+    """Request model for streaming conversations."""
+
+    input: str
+
+
+class ResumeInput(BaseModel):
+    """Request model for resuming conversations."""
+
+    resume: str
+    # Id of the interrupt being answered, from the __interrupt__ event
+    interrupt_id: str | None = None
+
+
+def create_graph_router(name: str) -> APIRouter:
+    """Create the stream, resume, retry, state and WebSocket endpoints of a graph.
+
+    Every run goes through the graph's pool, so concurrency limits and run
+    metrics apply the same way to all graphs.
+
+    Args:
+        name: Graph name, as registered in langgraph.json
+
+    Returns:
+        APIRouter: Router to include in the app
+    """
+    prefix = GRAPH_PREFIXES.get(name, f"/graphs/{name}/threads")
+    router = APIRouter(prefix=prefix, tags=[GRAPH_TAGS.get(name, name)])
+    pool = get_graph_pool(name)
+
+    async def run_graph(graph_input, config):
+        """Run the graph and return streaming response."""
+        enforce_budget(config)
+        return await pool.stream(
+            lambda: create_graph_stream(get_graph(name), graph_input, config)
+        )
+
+    @router.post("/{thread_id}/stream")
+    async def stream_thread(
+        thread_id: str,
+        body: StreamInput,
+        tenant_id: str = Depends(get_tenant_id),
+    ):
+        """Stream conversation updates for a specific thread."""
+        config = thread_config(thread_id, tenant_id, name)
+        message = {"content": body.input, "type": "human"}
+        graph_input = {"messages": [message]}
+
+        print(f"[{name}] Streaming for thread_id: {thread_id}")
+        print(f"Message: {message}")
+
+        return await run_graph(graph_input, config)
+
+    @router.post("/{thread_id}/resume")
+    async def resume_thread(
+        thread_id: str,
+        body: ResumeInput,
+        tenant_id: str = Depends(get_tenant_id),
+        idempotency_key: str | None = Header(default=None, alias="Idempotency-Key"),
+    ):
+        """Resume a conversation from an interrupt point."""
+        config = thread_config(thread_id, tenant_id, name)
+
+        print(f"[{name}] Resuming thread_id: {thread_id} with resume data")
+
+        enforce_budget(config)
+        return await pool.stream(
+            lambda: idempotent_resume(
+                get_graph(name),
+                config,
+                body.resume,
+                idempotency_key,
+                body.interrupt_id,
+            )
+        )
+
+    @router.post("/{thread_id}/retry")
+    async def retry_thread(thread_id: str, tenant_id: str = Depends(get_tenant_id)):
+        """Retry the last action in a thread."""
+        config = thread_config(thread_id, tenant_id, name)
+        graph_input = None  # Input is None for a retry
+
+        print(f"[{name}] Retrying thread_id: {thread_id}")
+
+        return await run_graph(graph_input, config)
+
+    @router.get("/{thread_id}/state")
+    async def thread_state(
+        thread_id: str,
+        request: Request,
+        fields: str | None = None,
+        last: int | None = Query(default=None, ge=0, le=MAX_STATE_PAGE_SIZE),
+        offset: int = Query(default=0, ge=0),
+        limit: int = Query(default=50, ge=0, le=MAX_STATE_PAGE_SIZE),
+        include_tool_calls: bool = True,
+    ):
+        """Get the checkpointed state of a thread, paginated and projected."""
+        return await query_thread_state(
+            get_graph(name),
+            thread_id,
+            request,
+            fields=fields,
+            last=last,
+            offset=offset,
+            limit=limit,
+            include_tool_calls=include_tool_calls,
+        )
+
+    @router.websocket("/{thread_id}/ws")
+    async def thread_websocket(websocket: WebSocket, thread_id: str):
+        """Stream and resume a thread over a single WebSocket connection."""
+        print(f"[{name}] WebSocket connected for thread_id: {thread_id}")
+
+        await run_graph_websocket(websocket, get_graph(name), thread_id, pool, name)
+
+    return router
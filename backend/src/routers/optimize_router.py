@@ -0,0 +1,53 @@
+"""Optimize router for headless prompt optimization jobs."""
+
+from fastapi import APIRouter, Depends, HTTPException
+from pydantic import BaseModel, Field
+from src.shared.optimizer import (
+    OptimizationJob,
+    OptimizationQueue,
+    OptimizationSettings,
+    job_thread_id,
+)
+from src.shared.usage import enforce_budget, get_tenant_id, thread_config
+
+router = APIRouter(prefix="/optimize", tags=["optimize"])
+
+queue = OptimizationQueue()
+
+
+class OptimizeInput(BaseModel):
+    """Request model for queueing optimization jobs."""
+
+    goals: list[str] = Field(min_length=1)
+    settings: OptimizationSettings = Field(default_factory=OptimizationSettings)
+
+
+@router.post("/jobs")
+async def create_optimization_jobs(
+    body: OptimizeInput, tenant_id: str = Depends(get_tenant_id)
+) -> list[OptimizationJob]:
+    """Queue one headless optimization job per goal."""
+    print(f"Queueing {len(body.goals)} optimization jobs")
+
+    jobs = [
+        OptimizationJob(goal=goal, tenant_id=tenant_id, settings=body.settings)
+        for goal in body.goals
+    ]
+    # The job threads are new, this rejects tenants already over budget
+    enforce_budget(thread_config(job_thread_id(jobs[0]), tenant_id, "main"))
+    return [queue.submit(job) for job in jobs]
+
+
+@router.get("/jobs")
+async def list_optimization_jobs() -> list[OptimizationJob]:
+    """List all optimization jobs."""
+    return queue.list_jobs()
+
+
+@router.get("/jobs/{job_id}")
+async def get_optimization_job(job_id: str) -> OptimizationJob:
+    """Get the progress and best prompt of an optimization job."""
+    job = queue.get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
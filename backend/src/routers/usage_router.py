@@ -0,0 +1,26 @@
+"""Usage router for querying token consumption."""
+
+from fastapi import APIRouter
+from src.shared.usage import LEDGER, thread_key
+
+router = APIRouter(prefix="/usage", tags=["usage"])
+
+
+@router.get("/threads/{thread_id}")
+async def thread_usage(thread_id: str, graph: str = "main"):
+    """Get the tokens consumed by a thread of a graph and its remaining budget."""
+    return LEDGER.report(
+        LEDGER.threads.get(thread_key(thread_id, graph)), LEDGER.thread_budget
+    )
+
+
+@router.get("/tenants/{tenant_id}")
+async def tenant_usage(tenant_id: str):
+    """Get the tokens consumed by a tenant and its remaining budget."""
+    return LEDGER.report(LEDGER.tenants.get(tenant_id), LEDGER.tenant_budget)
+
+
+@router.get("/cache")
+async def cache_usage():
+    """Get the prompt cache hits across all tenants."""
+    return LEDGER.cache_report()
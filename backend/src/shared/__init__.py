@@ -1 +1,6 @@
-"""Shared utilities, state management, and prompts."""
\ No newline at end of file
+"""Shared utilities, state management, and prompts."""
+
+from dotenv import load_dotenv
+
+# Load the environment once, before any module reads its settings
+load_dotenv()
@@ -0,0 +1,85 @@
+"""Batch prompt testing with bounded concurrency."""
+
+import asyncio
+import json
+import os
+from typing import Any, AsyncGenerator
+
+from fastapi.responses import StreamingResponse
+
+DEFAULT_BATCH_CONCURRENCY = int(os.environ.get("BATCH_MAX_CONCURRENCY", "8"))
+
+
+async def run_prompt_batch(
+    llm,
+    prompts: list[str],
+    samples: int = 1,
+    max_concurrency: int | None = None,
+    config: dict | None = None,
+) -> AsyncGenerator[dict[str, Any], None]:
+    """Run every prompt `samples` times and yield results in completion order.
+
+    Args:
+        llm: Chat model used to run the prompts
+        prompts: Prompts to test
+        samples: Number of times each prompt is run
+        max_concurrency: Maximum number of model calls in flight
+        config: Runnable config of the model calls, e.g. with usage callbacks
+
+    Yields:
+        dict: One result (or error) per prompt sample
+    """
+    limit = min(max_concurrency or DEFAULT_BATCH_CONCURRENCY, DEFAULT_BATCH_CONCURRENCY)
+    semaphore = asyncio.Semaphore(max(limit, 1))
+
+    async def run_sample(index: int, sample: int, prompt: str) -> dict[str, Any]:
+        async with semaphore:
+            try:
+                result = await llm.ainvoke(prompt, config)
+            except Exception as e:
+                return {"index": index, "sample": sample, "error": str(e)}
+        return {
+            "index": index,
+            "sample": sample,
+            "result": str(result.content),
+            "usage": getattr(result, "usage_metadata", None),
+        }
+
+    tasks = [
+        asyncio.create_task(run_sample(index, sample, prompt))
+        for index, prompt in enumerate(prompts)
+        for sample in range(samples)
+    ]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        # Stop paying for model calls once the client has gone away
+        for task in tasks:
+            task.cancel()
+
+
+def create_ndjson_stream(results: AsyncGenerator[dict[str, Any], None]) -> StreamingResponse:
+    """Create a streaming response that writes one JSON object per line.
+
+    Args:
+        results: Async generator of JSON-serializable results
+
+    Returns:
+        StreamingResponse: FastAPI streaming response with NDJSON format
+    """
+
+    async def generate_stream() -> AsyncGenerator[str, None]:
+        count = 0
+        async for result in results:
+            count += 1
+            yield json.dumps(result) + "\n"
+
+        yield json.dumps({"type": "done", "count": count}) + "\n"
+
+    return StreamingResponse(
+        generate_stream(),
+        media_type="application/x-ndjson",
+        # Keeps GZipMiddleware from buffering the lines until the batch ends
+        headers={"Cache-Control": "no-cache", "Content-Encoding": "identity"},
+    )
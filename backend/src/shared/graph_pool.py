@@ -0,0 +1,129 @@
+"""Per-graph limits on concurrent runs, with their metrics."""
+
+import asyncio
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import Any
+
+from fastapi import HTTPException
+from fastapi.responses import StreamingResponse
+from src.shared.stream_buffer import ClosingStreamingResponse
+
+# Concurrent runs allowed per graph (0 means unlimited) and seconds a run waits
+# for a free slot before being rejected
+GRAPH_MAX_CONCURRENCY = int(os.environ.get("GRAPH_MAX_CONCURRENCY", "16"))
+GRAPH_QUEUE_TIMEOUT = float(os.environ.get("GRAPH_QUEUE_TIMEOUT", "30"))
+
+
+class GraphPoolFull(Exception):
+    """Raised when no run slot of a graph frees up within the queue timeout."""
+
+
+class GraphPool:
+    """Bounded set of concurrent runs of one graph.
+
+    Each graph gets its own pool, so a burst on one graph queues behind its
+    own limit instead of starving the others served by the same process.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_concurrency: int = GRAPH_MAX_CONCURRENCY,
+        queue_timeout: float = GRAPH_QUEUE_TIMEOUT,
+    ):
+        """Create the pool of graph `name`, with 0 meaning no concurrency limit."""
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.queue_timeout = queue_timeout
+        self._semaphore = asyncio.Semaphore(max_concurrency) if max_concurrency else None
+        self.metrics: dict[str, Any] = {
+            "max_concurrency": max_concurrency or None,
+            "runs": 0,
+            "active": 0,
+            "peak_active": 0,
+            "queued": 0,
+            "rejected": 0,
+            "failed": 0,
+            "run_seconds": 0.0,
+        }
+
+    async def acquire(self) -> float:
+        """Wait for a run slot and return the time the run started."""
+        if self._semaphore is not None:
+            self.metrics["queued"] += 1
+            try:
+                await asyncio.wait_for(self._semaphore.acquire(), self.queue_timeout)
+            except TimeoutError:
+                self.metrics["rejected"] += 1
+                raise GraphPoolFull(
+                    f"Graph '{self.name}' is at its limit of {self.max_concurrency} runs"
+                )
+            finally:
+                self.metrics["queued"] -= 1
+
+        self.metrics["runs"] += 1
+        self.metrics["active"] += 1
+        self.metrics["peak_active"] = max(
+            self.metrics["peak_active"], self.metrics["active"]
+        )
+        return time.monotonic()
+
+    def release(self, started: float, failed: bool = False):
+        """Free the slot of a run that started at `started`."""
+        self.metrics["active"] -= 1
+        self.metrics["run_seconds"] += time.monotonic() - started
+        if failed:
+            self.metrics["failed"] += 1
+        if self._semaphore is not None:
+            self._semaphore.release()
+
+    @asynccontextmanager
+    async def run(self):
+        """Hold a run slot for the duration of the block."""
+        started = await self.acquire()
+        failed = True
+        try:
+            yield
+            failed = False
+        finally:
+            self.release(started, failed)
+
+    async def stream(self, create_response) -> StreamingResponse:
+        """Hold a run slot until a streaming response has been fully sent.
+
+        Args:
+            create_response: Coroutine function returning the StreamingResponse
+
+        Returns:
+            StreamingResponse: The response, releasing its slot when it ends
+
+        Raises:
+            HTTPException: 503 when no slot frees up within the queue timeout
+        """
+        try:
+            started = await self.acquire()
+        except GraphPoolFull as e:
+            raise HTTPException(status_code=503, detail=str(e))
+
+        try:
+            response = await create_response()
+        except BaseException:
+            self.release(started, failed=True)
+            raise
+
+        return ClosingStreamingResponse(
+            response, lambda failed: self.release(started, failed)
+        )
+
+
+GRAPH_POOLS: dict[str, GraphPool] = {}
+
+
+def get_graph_pool(name: str) -> GraphPool:
+    """Return the pool of the graph registered under `name`."""
+    pool = GRAPH_POOLS.get(name)
+    if pool is None:
+        pool = GRAPH_POOLS[name] = GraphPool(name)
+    return pool
@@ -0,0 +1,171 @@
+"""Deduplication of repeated resume requests."""
+
+import asyncio
+import hashlib
+import json
+import os
+import time
+from typing import Any, AsyncGenerator
+
+from fastapi import HTTPException
+from fastapi.responses import StreamingResponse
+from langgraph.types import Command
+from src.shared.stream_buffer import ClosingStreamingResponse
+from src.shared.streaming import create_graph_stream, sse_response
+
+# How long the events of a finished resume are kept for its duplicates
+IDEMPOTENCY_TTL_SECONDS = float(os.environ.get("IDEMPOTENCY_TTL_SECONDS", "300"))
+
+
+class ResumeRecording:
+    """SSE chunks sent for one resume, replayable while it is still running."""
+
+    def __init__(self, ttl: float):
+        """Start an empty recording kept for `ttl` seconds once finished."""
+        self.ttl = ttl
+        # Kept until the run finishes, then for `ttl` seconds
+        self.expires_at: float | None = None
+        self.chunks: list[str] = []
+        self.finished = False
+        self.complete = False
+        self._changed = asyncio.Condition()
+
+    async def append(self, chunk: str):
+        """Record a chunk sent to the original client."""
+        async with self._changed:
+            self.chunks.append(chunk)
+            self._changed.notify_all()
+
+    async def finish(self, complete: bool):
+        """Mark the original stream as over, `complete` if it ran to the end."""
+        async with self._changed:
+            self.finished = True
+            self.complete = complete
+            self.expires_at = time.monotonic() + self.ttl
+            self._changed.notify_all()
+
+    async def replay(self) -> AsyncGenerator[str, None]:
+        """Yield the recorded chunks, following the original stream if still running."""
+        sent = 0
+        while True:
+            async with self._changed:
+                while sent == len(self.chunks) and not self.finished:
+                    await self._changed.wait()
+                chunks = self.chunks[sent:]
+                finished = self.finished
+            for chunk in chunks:
+                yield chunk
+            sent += len(chunks)
+            if finished and sent == len(self.chunks):
+                return
+
+
+class ResumeCache:
+    """Short-lived map of resume keys to their recordings."""
+
+    def __init__(self):
+        """Create an empty cache."""
+        self._recordings: dict[str, ResumeRecording] = {}
+
+    def get(self, key: str) -> ResumeRecording | None:
+        """Return the live recording stored under `key`, if any."""
+        self._purge()
+        recording = self._recordings.get(key)
+        # A stream cut off by its client did not finish the resume, run it again
+        if recording is not None and recording.finished and not recording.complete:
+            del self._recordings[key]
+            return None
+        return recording
+
+    def put(self, key: str, recording: ResumeRecording):
+        """Store `recording` under `key`."""
+        self._recordings[key] = recording
+
+    def _purge(self):
+        now = time.monotonic()
+        expired = [
+            key
+            for key, recording in self._recordings.items()
+            if recording.expires_at is not None and recording.expires_at < now
+        ]
+        for key in expired:
+            del self._recordings[key]
+
+
+RESUME_CACHE = ResumeCache()
+
+
+def _derived_key(thread_id: str, interrupt_ids: list[str], resume: Any) -> str:
+    """Key a resume by the interrupts it answers plus a hash of its payload."""
+    payload_hash = hashlib.sha256(json.dumps(resume, sort_keys=True).encode()).hexdigest()
+    return f"{thread_id}:interrupt:{','.join(interrupt_ids)}:{payload_hash}"
+
+
+async def idempotent_resume(
+    graph,
+    config: dict,
+    resume: Any,
+    idempotency_key: str | None = None,
+    interrupt_id: str | None = None,
+) -> StreamingResponse:
+    """Resume a thread, replaying the recorded events for duplicate requests.
+
+    Requests are deduplicated by their Idempotency-Key header or, without one,
+    by the interrupt they answer plus a hash of the payload. The interrupt is
+    the `interrupt_id` the client read from the `__interrupt__` event, or the
+    ones pending on the thread when it is not given. Only a client sending the
+    id is protected from duplicates arriving after the thread moved on, which
+    are rejected with a 409 once their recording has expired. A duplicate that
+    arrives while the original is still running follows its events instead of
+    executing the graph again.
+
+    Args:
+        graph: The compiled graph owning the thread
+        config: Configuration dictionary for the graph execution
+        resume: The resume payload
+        idempotency_key: Optional client supplied key
+        interrupt_id: Optional id of the interrupt the resume answers
+
+    Returns:
+        StreamingResponse: FastAPI streaming response with SSE format
+
+    Raises:
+        HTTPException: 409 when `interrupt_id` is no longer pending
+    """
+    thread_id = config["configurable"]["thread_id"]
+
+    if idempotency_key:
+        key = f"{thread_id}:key:{idempotency_key}"
+    else:
+        snapshot = await graph.aget_state(config)
+        pending = [interrupt.id for interrupt in snapshot.interrupts]
+        key = _derived_key(thread_id, [interrupt_id] if interrupt_id else pending, resume)
+
+    # No await between the lookup and the put, so concurrent duplicates share a run
+    recording = RESUME_CACHE.get(key)
+    if recording is not None:
+        print(f"Replaying duplicate resume for thread_id: {thread_id}")
+        return sse_response(recording.replay(), headers={"Idempotent-Replayed": "true"})
+
+    if not idempotency_key and interrupt_id and interrupt_id not in pending:
+        raise HTTPException(
+            status_code=409,
+            detail=f"Interrupt {interrupt_id} is not pending on thread {thread_id}",
+        )
+
+    recording = ResumeRecording(IDEMPOTENCY_TTL_SECONDS)
+    RESUME_CACHE.put(key, recording)
+
+    async def run():
+        response = await create_graph_stream(
+            graph, Command(resume=resume), config, recording
+        )
+        async for chunk in response.body_iterator:
+            yield chunk
+
+    async def finish_if_never_sent(failed: bool):
+        # The body was never iterated, e.g. the client left before it started
+        if not recording.finished:
+            await recording.finish(False)
+
+    return ClosingStreamingResponse(sse_response(run()), finish_if_never_sent)
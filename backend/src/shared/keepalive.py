@@ -0,0 +1,104 @@
+"""Warm-up and keep-alive of local Ollama models."""
+
+import asyncio
+import os
+import time
+from typing import Any
+
+# Seconds between keep-alive pings (0 disables the keep-alive loop)
+KEEPALIVE_INTERVAL = float(os.environ.get("OLLAMA_KEEPALIVE_INTERVAL", "240"))
+# How long Ollama keeps a model resident after each ping
+KEEPALIVE_DURATION = os.environ.get("OLLAMA_KEEPALIVE_DURATION", "10m")
+# Load times above this mean the model had been evicted and was loaded again
+COLD_LOAD_THRESHOLD_MS = 250
+
+
+def configured_ollama_models() -> list[str]:
+    """Return the Ollama models used by the graphs (without the "ollama:" prefix)."""
+    from src.graphs.basic_graph import BASIC_MODEL
+
+    models = [BASIC_MODEL, os.environ.get("LLM_MODEL", "")]
+    models += os.environ.get("OLLAMA_KEEPALIVE_MODELS", "").split(",")
+    return sorted(
+        {m.removeprefix("ollama:") for m in models if m.startswith("ollama:")}
+    )
+
+
+def _ms(nanoseconds: int | None) -> float | None:
+    return None if nanoseconds is None else round(nanoseconds / 1e6, 1)
+
+
+class OllamaKeepAlive:
+    """Preload Ollama models and ping them periodically to keep them resident."""
+
+    def __init__(
+        self,
+        models: list[str],
+        host: str | None = None,
+        interval: float = KEEPALIVE_INTERVAL,
+        keep_alive: str = KEEPALIVE_DURATION,
+    ):
+        """Create the Ollama client; nothing is loaded until `warm_up()`."""
+        from ollama import AsyncClient
+
+        # host=None falls back to OLLAMA_HOST or the default local server
+        self.client = AsyncClient(host=host)
+        self.models = models
+        self.interval = interval
+        self.keep_alive = keep_alive
+        self.stats: dict[str, dict[str, Any]] = {
+            model: {"status": "pending", "pings": 0, "cold_loads": 0}
+            for model in models
+        }
+        self._task: asyncio.Task | None = None
+
+    async def ping(self, model: str) -> dict[str, Any]:
+        """Load `model` (if needed) and record its load versus eval time."""
+        stats = self.stats[model]
+        started = time.monotonic()
+        try:
+            # An empty prompt only loads the model and refreshes its keep-alive
+            response = await self.client.generate(
+                model=model, prompt="", keep_alive=self.keep_alive
+            )
+        except Exception as e:
+            stats.update(status="error", error=str(e))
+            return stats
+
+        load_ms = _ms(response.load_duration)
+        stats.update(
+            status="loaded",
+            error=None,
+            pings=stats["pings"] + 1,
+            last_ping=time.time(),
+            latency_ms=round((time.monotonic() - started) * 1000, 1),
+            load_ms=load_ms,
+            prompt_eval_ms=_ms(response.prompt_eval_duration),
+            eval_ms=_ms(response.eval_duration),
+            total_ms=_ms(response.total_duration),
+        )
+        if load_ms and load_ms > COLD_LOAD_THRESHOLD_MS:
+            stats["cold_loads"] += 1
+        return stats
+
+    async def warm_up(self):
+        """Preload all models concurrently."""
+        await asyncio.gather(*(self.ping(model) for model in self.models))
+
+    async def _run(self):
+        await self.warm_up()
+        while self.interval > 0:
+            await asyncio.sleep(self.interval)
+            await self.warm_up()
+
+    def start(self):
+        """Warm up the models and start the keep-alive loop in the background."""
+        if self.models and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the keep-alive loop."""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
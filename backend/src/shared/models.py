@@ -0,0 +1,20 @@
+"""Lazily initialized chat models shared by the graphs."""
+
+import os
+from functools import cache
+
+
+@cache
+def get_chat_model(model: str | None = None, **kwargs):
+    """Return the chat model, initializing it on first use.
+
+    Args:
+        model: Model identifier, defaults to the LLM_MODEL environment variable
+        **kwargs: Extra arguments for init_chat_model (e.g. temperature)
+
+    Returns:
+        BaseChatModel: Cached chat model instance
+    """
+    from langchain.chat_models import init_chat_model
+
+    return init_chat_model(model or os.environ["LLM_MODEL"], **kwargs)
@@ -0,0 +1,238 @@
+"""Headless prompt optimization that answers the graph interrupts with an LLM judge."""
+
+import asyncio
+import os
+import time
+import uuid
+from typing import Literal
+
+from langgraph.types import Command
+from pydantic import BaseModel, Field
+from src.graphs.registry import get_graph
+from src.shared.models import get_chat_model
+from src.shared.prompts import JUDGE_PROMPT
+from src.shared.usage import (
+    DEFAULT_TENANT,
+    LEDGER,
+    TokenBudgetExceeded,
+    thread_config,
+    thread_key,
+)
+from src.shared.utils import judge_result_tool
+
+OPTIMIZER_WORKERS = int(os.environ.get("OPTIMIZER_WORKERS", "4"))
+# Seconds a finished job stays listed before it is forgotten
+OPTIMIZER_JOB_TTL_SECONDS = float(os.environ.get("OPTIMIZER_JOB_TTL_SECONDS", "3600"))
+
+
+class OptimizationSettings(BaseModel):
+    """Stopping rules for a headless optimization run."""
+
+    max_iterations: int = Field(default=5, ge=1, le=50)
+    score_threshold: int = Field(default=9, ge=1, le=10)
+    patience: int = Field(
+        default=2,
+        ge=1,
+        description="Iterations without improvement before the run is stopped.",
+    )
+    min_improvement: int = Field(default=1, ge=0)
+
+
+class OptimizationIteration(BaseModel):
+    """One test → judge round of an optimization run."""
+
+    prompt: str
+    result: str
+    score: int
+    feedback: str
+
+
+class OptimizationJob(BaseModel):
+    """State of a headless optimization run."""
+
+    id: str = Field(default_factory=lambda: uuid.uuid4().hex)
+    goal: str
+    tenant_id: str = DEFAULT_TENANT
+    settings: OptimizationSettings = Field(default_factory=OptimizationSettings)
+    status: Literal["queued", "running", "done", "error"] = "queued"
+    stop_reason: str | None = None
+    iterations: list[OptimizationIteration] = Field(default_factory=list)
+    best_prompt: str | None = None
+    best_score: int = 0
+    error: str | None = None
+    finished_at: float | None = None
+
+
+async def judge_result(
+    llm, goal: str, prompt: str, result: str, config: dict | None = None
+) -> tuple[int, str]:
+    """Score a prompt result against the goal and return (score, feedback)."""
+    judge_prompt = JUDGE_PROMPT.messages(goal=goal, prompt=prompt, result=result)
+
+    llm_with_tools = llm.bind_tools([judge_result_tool])
+    response = await llm_with_tools.ainvoke(judge_prompt, config)
+
+    if not response.tool_calls:
+        return 0, str(response.content)
+
+    args = response.tool_calls[0]["args"]
+    return int(args.get("score", 0)), args.get("feedback", "")
+
+
+def should_stop(job: OptimizationJob) -> str | None:
+    """Return the reason to stop the run, if any of the stopping rules is met."""
+    settings = job.settings
+    scores = [iteration.score for iteration in job.iterations]
+
+    if scores and scores[-1] >= settings.score_threshold:
+        return "score_threshold"
+    if len(scores) >= settings.max_iterations:
+        return "max_iterations"
+    if len(scores) > settings.patience:
+        best_before = max(scores[: -settings.patience])
+        best_recent = max(scores[-settings.patience :])
+        if best_recent - best_before < settings.min_improvement:
+            return "plateau"
+    return None
+
+
+def job_thread_id(job: OptimizationJob) -> str:
+    """Return the id of the prompt graph thread a job runs in."""
+    return f"optimize-{job.id}"
+
+
+async def run_optimization(graph, llm, job: OptimizationJob) -> OptimizationJob:
+    """Drive the test → autoimprove loop of the prompt graph without a human.
+
+    Every create_prompt_tool interrupt is resumed with "test" and every
+    test_prompt_tool interrupt is answered with the judge feedback, until one
+    of the stopping rules in the job settings is met.
+    """
+    config = thread_config(job_thread_id(job), job.tenant_id, "main")
+    graph_input = {"messages": [{"content": job.goal, "type": "human"}]}
+    job.status = "running"
+
+    while True:
+        try:
+            await graph.ainvoke(graph_input, config)
+        except TokenBudgetExceeded as e:
+            job.stop_reason = "budget_exceeded"
+            job.error = str(e)
+            break
+        snapshot = await graph.aget_state(config)
+
+        if not snapshot.interrupts:
+            job.stop_reason = "finished"
+            break
+
+        value = snapshot.interrupts[0].value
+        if "result" in value:
+            prompt = snapshot.values["prompt"].content
+            try:
+                score, feedback = await judge_result(
+                    llm, job.goal, prompt, value["result"], config
+                )
+            except TokenBudgetExceeded as e:
+                job.stop_reason = "budget_exceeded"
+                job.error = str(e)
+                break
+            job.iterations.append(
+                OptimizationIteration(
+                    prompt=prompt, result=value["result"], score=score, feedback=feedback
+                )
+            )
+            if score > job.best_score or job.best_prompt is None:
+                job.best_prompt, job.best_score = prompt, score
+
+            print(f"Optimization {job.id} iteration {len(job.iterations)}: {score}")
+
+            if stop_reason := should_stop(job):
+                job.stop_reason = stop_reason
+                break
+            graph_input = Command(resume=feedback)
+        elif "prompt" in value:
+            graph_input = Command(resume="test")
+        else:
+            job.stop_reason = "unexpected_interrupt"
+            break
+
+    job.status = "done"
+    return job
+
+
+class OptimizationQueue:
+    """Job queue processing many optimization runs concurrently.
+
+    The graph thread of a job is deleted once the job finishes, only its
+    result is kept, and finished jobs are forgotten after `job_ttl` seconds.
+    """
+
+    def __init__(
+        self, workers: int = OPTIMIZER_WORKERS, job_ttl: float = OPTIMIZER_JOB_TTL_SECONDS
+    ):
+        """Create an empty queue, the workers start on the first submit."""
+        self.workers = workers
+        self.job_ttl = job_ttl
+        self.jobs: dict[str, OptimizationJob] = {}
+        self._queue: asyncio.Queue[OptimizationJob] = asyncio.Queue()
+        self._tasks: list[asyncio.Task] = []
+
+    def submit(self, job: OptimizationJob) -> OptimizationJob:
+        """Queue a job, starting the workers on first use."""
+        if not self._tasks:
+            self._tasks = [
+                asyncio.create_task(self._worker()) for _ in range(self.workers)
+            ]
+        self._purge()
+        self.jobs[job.id] = job
+        self._queue.put_nowait(job)
+        return job
+
+    def get_job(self, job_id: str) -> OptimizationJob | None:
+        """Return a job that has not expired yet."""
+        self._purge()
+        return self.jobs.get(job_id)
+
+    def list_jobs(self) -> list[OptimizationJob]:
+        """Return the jobs that have not expired yet."""
+        self._purge()
+        return list(self.jobs.values())
+
+    def _purge(self):
+        expires_before = time.time() - self.job_ttl
+        for job_id, job in list(self.jobs.items()):
+            if job.finished_at is not None and job.finished_at < expires_before:
+                del self.jobs[job_id]
+
+    async def stop(self):
+        """Cancel the workers."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _worker(self):
+        while True:
+            job = await self._queue.get()
+            graph = None
+            try:
+                graph = get_graph("main")
+                await run_optimization(graph, get_chat_model(), job)
+            except Exception as e:
+                job.status = "error"
+                job.error = str(e)
+            finally:
+                if graph is not None:
+                    await self._delete_thread(graph, job)
+                job.finished_at = time.time()
+                self._queue.task_done()
+
+    async def _delete_thread(self, graph, job: OptimizationJob):
+        """Free the checkpoints and thread usage of a finished job."""
+        thread_id = job_thread_id(job)
+        try:
+            await graph.checkpointer.adelete_thread(thread_id)
+        except Exception as e:
+            print(f"Could not delete the thread of optimization {job.id}: {e}")
+        # The tenant totals keep the tokens the job used
+        LEDGER.threads.pop(thread_key(thread_id, "main"), None)
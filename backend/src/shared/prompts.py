@@ -1,16 +1,34 @@
-CLARIFY_PROMPT = """
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class SplitPrompt:
+    """A prompt split into a static system prefix and a per-call human suffix.
+
+    The system part never changes between calls, so provider prompt caches
+    and the Ollama KV cache can reuse it. Only the human part is formatted.
+    """
+
+    system: str
+    human: str
+
+    def messages(self, **kwargs) -> list[tuple[str, str]]:
+        """Return the chat messages for one call."""
+        return [("system", self.system), ("human", self.human.format(**kwargs))]
+
+
+CLARIFY_PROMPT = SplitPrompt(
+    system="""
 <INSTRUCTIONS>
     You are a prompt engineering assistant. Your goal is to call the tool 'ask_questions_tool' with the right parameters.
 
-    Based on the user message, generate 2-4 questions (NO MORE) to gather more details about the prompt for better generation.
+    Based on the user message, generate 2-4 questions (NO MORE) to gather more details about the prompt in <CURRENT_PROMPT> for better generation.
 
     DO NOT RETURN ANYTHING ELSE. JUST CALL THE TOOL 'ask_questions_tool' with the questions array.
     
     Prefer questions with options.
     
-    AT LEAST ONE TEXT QUESTION AND AT LEAST ONE RADIO QUESTION    
-    
-    {missing_info}
+    AT LEAST ONE TEXT QUESTION AND AT LEAST ONE RADIO QUESTION
 </INSTRUCTIONS>
 
 <QUESTION_TYPES>
@@ -26,7 +44,7 @@ CLARIFY_PROMPT = """
 </QUESTION_TYPES>
 
 <TOOL_CALL_INSTRUCTIONS>
-    Call the tool with an array of JSON objects: {{"id": "qX", "question": "...", "options": [...]}} (options only for radio).
+    Call the tool with an array of JSON objects: {"id": "qX", "question": "...", "options": [...]} (options only for radio).
 
     Mix types to clarify effectively—at least 1 of each if possible.
 </TOOL_CALL_INSTRUCTIONS>
@@ -35,32 +53,53 @@ CLARIFY_PROMPT = """
 Examples:
 
 <For_radio_questions>
-{{"id": "q1", "question": "What is your primary goal with this task?", "options": ["Generate a report", "Analyze data", "Create a visualization"]}}
+{"id": "q1", "question": "What is your primary goal with this task?", "options": ["Generate a report", "Analyze data", "Create a visualization"]}
 </For_radio_questions>
 
 <For_text_questions>
-{{"id": "q1", "question": "What specific challenges are you facing in your current workflow?"}}
+{"id": "q1", "question": "What specific challenges are you facing in your current workflow?"}
 </For_text_questions>
 </EXAMPLES>
+""",
+    human="""
+{missing_info}
 
 <CURRENT_PROMPT>
     {prompt}
 </CURRENT_PROMPT>
-"""
+""",
+)
 
 
-PROMPT_TEMPLATE = """
-You are a prompt engineering assistant.
+QUESTIONS_PROMPT = SplitPrompt(
+    system="""
+    Your goal is to call the tool ask_questions_tool with the right paramters.
 
-Based on the user's messages and any existing prompt, generate or improve a prompt that fulfills their needs.
+    Based on the user message, please do questions to the user that help you define the goal, context, output_format and role.
 
-<Context AND Improvements> 
-{formatted_messages}
-</Context AND Improvements> 
+    Call the tool with the questions as an array of JSON objects.
+    questions: [
+        {"id": "q1", "question": "question1", "options":["option1", "option2", "option3"]},
+    ]
 
-<Current Prompt State>
-{prompt}
-</Current Prompt State>
+    3 or 4 QUESTIONS, NO MORE
+
+    Never include Other in the options.
+
+    DO NOT RETURN ANYHITNG. JUST CALL THE TOOL ask_questions_tool with the right options
+""",
+    human="""
+    The user message is:
+    {messages}
+""",
+)
+
+
+PROMPT_TEMPLATE = SplitPrompt(
+    system="""
+You are a prompt engineering assistant.
+
+Based on the user's messages and any existing prompt, generate or improve a prompt that fulfills their needs.
 
 **Instructions:**
 
@@ -76,4 +115,137 @@ Based on the user's messages and any existing prompt, generate or improve a prom
 When finished, call the `create_prompt_tool` with your final prompt as the parameter.
 
 DO NOT return any text other than calling the create_prompt_tool with the final prompt.
-"""
+""",
+    human="""
+<Context AND Improvements> 
+{formatted_messages}
+</Context AND Improvements> 
+
+<Current Prompt State>
+{prompt}
+</Current Prompt State>
+""",
+)
+
+
+AUTOIMPROVE_PROMPT = SplitPrompt(
+    system="""
+You are an expert prompt analyst. Focus ONLY on addressing the specific user feedback and clear gaps between the prompt in <PROMPT> and the result in <RESULT>.
+
+TASK: Identify improvements that directly address:
+1. Specific issues mentioned in the user's feedback in <FEEDBACK>
+2. Clear discrepancies between what the prompt asks for and what the result delivers
+3. Missing instructions that would prevent the issues seen in the result
+
+CONSTRAINTS:
+- Maximum 2-3 specific improvements
+- Each improvement must directly relate to the feedback or obvious prompt-result gaps
+- Avoid general improvements unless the feedback explicitly mentions them
+- Focus on actionable changes that will prevent the current issues
+
+Call the suggest_improvements_tool with ONLY the most relevant, specific improvements.
+""",
+    human="""
+<PROMPT>
+{prompt}
+</PROMPT>
+
+<RESULT>
+{result}
+</RESULT>
+
+<FEEDBACK>
+{feedback}
+</FEEDBACK>
+""",
+)
+
+
+EVALUATE_PROMPT = SplitPrompt(
+    system="""
+You are an expert prompt analyst. Evaluate the completeness of the prompt in <PROMPT> on a scale from 1 to 6, where:
+
+1 - Very incomplete: Lacks basic structure, unclear goal, missing key information
+2 - Incomplete: Has basic idea but missing important details and context
+3 - Somewhat complete: Has main elements but lacks specificity and clarity
+4 - Mostly complete: Good structure and details, but could use some refinement
+5 - Very complete: Well-structured with clear instructions and good context
+6 - Excellent: Comprehensive, specific, and ready for immediate use
+
+Consider these factors in your evaluation:
+- Clarity of the objective/goal
+- Specificity of instructions
+- Completeness of context and constraints
+- Structure and organization
+- Examples or guidelines provided
+- Target audience/purpose definition
+
+After analyzing the prompt, you MUST call the evaluate_prompt_tool with these parameters:
+- evaluation: int (your score from 1-6)
+- missing_info: str (brief description of what information is missing or needs improvement)
+
+Call the evaluate_prompt_tool with your evaluation score and missing information description.
+""",
+    human="""
+<PROMPT>
+{prompt}
+</PROMPT>
+""",
+)
+
+
+VARIANT_PROMPT = SplitPrompt(
+    system="""
+You are a prompt engineering assistant exploring alternative versions of a prompt.
+
+**Instructions:**
+
+1. Write the requested variant of the prompt inside `<Current Prompt State>`.
+2. Apply the improvements listed in `<Context AND Improvements>`, if any.
+3. Take a clearly different angle from the other variants — vary the structure, tone, level of detail or the examples given — while keeping the same goal.
+4. Keep the resulting prompt concise, professional, and ready for use.
+
+When finished, call the `create_prompt_tool` with your variant as the parameter.
+
+DO NOT return any text other than calling the create_prompt_tool with the variant.
+""",
+    human="""
+<Context AND Improvements>
+{formatted_messages}
+</Context AND Improvements>
+
+<Current Prompt State>
+{prompt}
+</Current Prompt State>
+
+Write variant {variant_number} of {variant_count}.
+""",
+)
+
+
+JUDGE_PROMPT = SplitPrompt(
+    system="""
+You are an expert prompt evaluator acting on behalf of the user. Judge how well the result in <RESULT> produced by the prompt in <PROMPT> fulfills the user's goal in <GOAL>.
+
+Score the result from 1 to 10, where 1 means it completely misses the goal and 10 means it fulfills the goal perfectly and needs no changes.
+
+Then write the feedback the user would give to improve the prompt: short, specific and actionable. Focus on the most important gaps between the result and the goal.
+
+After analyzing the result, you MUST call the judge_result_tool with these parameters:
+- score: int (your score from 1-10)
+- feedback: str (the feedback to improve the prompt)
+""",
+    human="""
+<GOAL>
+{goal}
+</GOAL>
+
+<PROMPT>
+{prompt}
+</PROMPT>
+
+<RESULT>
+{result}
+</RESULT>
+""",
+)
@@ -0,0 +1,201 @@
+"""Similarity cache of the clarifying questions generated for past inputs."""
+
+import hashlib
+import os
+import random
+import re
+import uuid
+from collections import OrderedDict
+from typing import Any
+
+from langchain_core.messages import AIMessage, BaseMessage, ToolCall
+from langgraph.config import get_stream_writer
+from src.shared.state import Question
+from src.shared.usage import DEFAULT_TENANT
+
+# Minimum estimated Jaccard similarity to serve cached questions and entries kept
+# (0 disables the cache)
+QUESTION_CACHE_THRESHOLD = float(os.environ.get("QUESTION_CACHE_THRESHOLD", "0.8"))
+QUESTION_CACHE_SIZE = int(os.environ.get("QUESTION_CACHE_SIZE", "512"))
+# Serve the questions cached for one tenant to every tenant (off by default, as
+# the cached questions echo the input they were generated for)
+QUESTION_CACHE_SHARED = os.environ.get("QUESTION_CACHE_SHARED", "").lower() in (
+    "1",
+    "true",
+    "yes",
+)
+
+SHINGLE_SIZE = 4
+# 64 hash functions split into 16 LSH bands of 4 rows
+NUM_PERMUTATIONS = 64
+BAND_ROWS = 4
+
+_PRIME = (1 << 61) - 1
+_rng = random.Random(0)
+_PERMUTATIONS = [
+    (_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME))
+    for _ in range(NUM_PERMUTATIONS)
+]
+
+
+def _shingles(text: str) -> set[str]:
+    """Character shingles of the text, ignoring case and whitespace runs."""
+    text = re.sub(r"\s+", " ", text.lower()).strip()
+    if len(text) <= SHINGLE_SIZE:
+        return {text}
+    return {text[i : i + SHINGLE_SIZE] for i in range(len(text) - SHINGLE_SIZE + 1)}
+
+
+def minhash(text: str) -> tuple[int, ...]:
+    """Return the MinHash signature of a text."""
+    hashes = [
+        int.from_bytes(hashlib.blake2b(s.encode(), digest_size=8).digest(), "big")
+        for s in _shingles(text)
+    ]
+    return tuple(min((a * h + b) % _PRIME for h in hashes) for a, b in _PERMUTATIONS)
+
+
+def similarity(left: tuple[int, ...], right: tuple[int, ...]) -> float:
+    """Estimate the Jaccard similarity of two signatures."""
+    return sum(x == y for x, y in zip(left, right)) / len(left)
+
+
+def _bands(signature: tuple[int, ...]) -> list[tuple]:
+    return [
+        (start, signature[start : start + BAND_ROWS])
+        for start in range(0, len(signature), BAND_ROWS)
+    ]
+
+
+class QuestionCache:
+    """LRU cache of ask_questions_tool arguments keyed by input similarity.
+
+    Inputs are indexed by MinHash signature with locality-sensitive hashing,
+    so a lookup only compares against inputs sharing at least one band
+    instead of the whole cache. Entries are only served to the tenant that
+    generated them, unless the cache is shared, and never back to the thread
+    that generated them, whose user has already answered those questions.
+    """
+
+    def __init__(
+        self,
+        threshold: float = QUESTION_CACHE_THRESHOLD,
+        maxsize: int = QUESTION_CACHE_SIZE,
+        shared: bool = QUESTION_CACHE_SHARED,
+    ):
+        """Create an empty cache serving inputs at least `threshold` similar."""
+        self.threshold = threshold
+        self.maxsize = maxsize
+        self.shared = shared
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0}
+        # (namespace, signature) -> (thread_id, questions)
+        self._entries: OrderedDict[tuple, tuple[str | None, list[dict[str, Any]]]] = (
+            OrderedDict()
+        )
+        self._buckets: dict[tuple, set[tuple]] = {}
+
+    def __len__(self) -> int:
+        """Return the number of cached inputs."""
+        return len(self._entries)
+
+    def _namespace(self, tenant_id: str) -> str:
+        return DEFAULT_TENANT if self.shared else tenant_id
+
+    def get(
+        self,
+        text: str,
+        tenant_id: str = DEFAULT_TENANT,
+        thread_id: str | None = None,
+    ) -> list[dict[str, Any]] | None:
+        """Return the questions of the most similar cached input above the threshold."""
+        if not self.maxsize:
+            return None
+
+        namespace = self._namespace(tenant_id)
+        signature = minhash(text)
+        candidates = set()
+        for band in _bands(signature):
+            candidates |= self._buckets.get((namespace, band), set())
+
+        best, best_score = None, self.threshold
+        for candidate in candidates:
+            if thread_id is not None and self._entries[candidate][0] == thread_id:
+                continue
+            score = similarity(signature, candidate[1])
+            if score >= best_score:
+                best, best_score = candidate, score
+
+        if best is None:
+            self.stats["misses"] += 1
+            return None
+        self.stats["hits"] += 1
+        self._entries.move_to_end(best)
+        return self._entries[best][1]
+
+    def put(
+        self,
+        text: str,
+        questions: list[dict[str, Any]],
+        tenant_id: str = DEFAULT_TENANT,
+        thread_id: str | None = None,
+    ):
+        """Cache the questions generated for an input, evicting the least recently used."""
+        if not self.maxsize:
+            return
+
+        namespace = self._namespace(tenant_id)
+        key = (namespace, minhash(text))
+        if key not in self._entries:
+            for band in _bands(key[1]):
+                self._buckets.setdefault((namespace, band), set()).add(key)
+        self._entries[key] = (thread_id, questions)
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.maxsize:
+            (namespace, evicted), _ = self._entries.popitem(last=False)
+            for band in _bands(evicted):
+                bucket = self._buckets[(namespace, band)]
+                bucket.discard((namespace, evicted))
+                if not bucket:
+                    del self._buckets[(namespace, band)]
+            self.stats["evictions"] += 1
+
+
+QUESTION_CACHE = QuestionCache()
+
+
+def question_cache_text(prompt: Any, messages: list) -> str:
+    """Return the raw user input the question cache is keyed on.
+
+    This is the current prompt, or the first human message before a prompt
+    exists. The rendered CLARIFY_PROMPT is not used, as its constant wrapper
+    would make unrelated short inputs look alike.
+    """
+    if isinstance(prompt, BaseMessage) and prompt.content:
+        return str(prompt.content)
+    for message in messages:
+        if isinstance(message, dict):
+            if message.get("type") == "human":
+                return str(message.get("content", ""))
+        elif getattr(message, "type", None) == "human":
+            return str(message.content)
+    return str(prompt or "")
+
+
+def cached_questions_message(questions: list[dict[str, Any]]) -> AIMessage:
+    """Build the ask_questions_tool call for cached questions.
+
+    The questions are also sent through the graph custom stream, like the
+    ones streamed while a model generates them.
+    """
+    writer = get_stream_writer()
+    for idx, question in enumerate(questions):
+        question = Question.model_validate(question).model_dump()
+        writer({"type": "question", "index": idx, "question": question})
+
+    tool_call = ToolCall(
+        name="ask_questions_tool",
+        args={"questions": questions},
+        id=f"cached_questions_{uuid.uuid4().hex}",
+    )
+    return AIMessage(content="", tool_calls=[tool_call])
@@ -0,0 +1,163 @@
+"""Serialization of stream events and checkpoints off the event loop for large payloads."""
+
+import asyncio
+import json
+import os
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any
+
+from langchain_core.load import dumpd
+from langchain_core.messages import BaseMessage
+from langgraph.checkpoint.memory import InMemorySaver
+
+# Where payloads above the threshold are serialized: "thread", "process" or "" to
+# always serialize on the event loop
+STREAM_SERIALIZE_EXECUTOR = os.environ.get("STREAM_SERIALIZE_EXECUTOR", "thread")
+STREAM_SERIALIZE_WORKERS = int(os.environ.get("STREAM_SERIALIZE_WORKERS", "2"))
+# Approximate payload size (characters of text) above which serialization is offloaded
+SERIALIZE_OFFLOAD_THRESHOLD = int(
+    os.environ.get("SERIALIZE_OFFLOAD_THRESHOLD", str(256 * 1024))
+)
+# Seconds between event loop lag probes
+LOOP_LAG_INTERVAL = float(os.environ.get("LOOP_LAG_INTERVAL", "0.5"))
+
+SERIALIZATION_METRICS: dict[str, Any] = {
+    "inline": 0,
+    "offloaded": 0,
+    "checkpoints_offloaded": 0,
+    "loop_lag_ms": 0.0,
+    "loop_lag_max_ms": 0.0,
+}
+
+
+def serialize_update(update: Any) -> str:
+    """Serialize a graph update to the JSON sent to the clients."""
+    return json.dumps(dumpd(update))
+
+
+def approximate_size(value: Any, limit: int = SERIALIZE_OFFLOAD_THRESHOLD) -> int:
+    """Cheaply estimate the serialized size of a value from the text it holds.
+
+    The walk stops as soon as the estimate reaches `limit`, so deciding that a
+    payload is large costs far less than serializing it.
+    """
+    size = 0
+    stack = [value]
+    while stack and size < limit:
+        item = stack.pop()
+        if isinstance(item, (str, bytes)):
+            size += len(item)
+        elif isinstance(item, BaseMessage):
+            stack.append(item.content)
+            stack.extend(getattr(item, "tool_calls", None) or ())
+        elif isinstance(item, dict):
+            stack.extend(item.values())
+        elif isinstance(item, (list, tuple)):
+            stack.extend(item)
+        else:
+            size += 8
+    return size
+
+
+_executor: Executor | None = None
+
+
+def get_serialize_executor() -> Executor | None:
+    """Return the executor large payloads are serialized in, created on first use."""
+    global _executor
+    if _executor is None and STREAM_SERIALIZE_EXECUTOR:
+        if STREAM_SERIALIZE_EXECUTOR == "process":
+            _executor = ProcessPoolExecutor(max_workers=STREAM_SERIALIZE_WORKERS)
+        else:
+            _executor = ThreadPoolExecutor(
+                max_workers=STREAM_SERIALIZE_WORKERS,
+                thread_name_prefix="serialize",
+            )
+    return _executor
+
+
+def shutdown_serialize_executor():
+    """Stop the serialization workers."""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+async def aserialize_update(update: Any) -> str:
+    """Serialize a graph update, in the executor when it is large."""
+    executor = get_serialize_executor()
+    if executor is None or approximate_size(update) < SERIALIZE_OFFLOAD_THRESHOLD:
+        SERIALIZATION_METRICS["inline"] += 1
+        return serialize_update(update)
+
+    SERIALIZATION_METRICS["offloaded"] += 1
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, serialize_update, update)
+
+
+class OffloadingSaver(InMemorySaver):
+    """In-memory checkpointer that serializes large checkpoints in a worker thread.
+
+    The checkpoints have to land in this process' memory, so they always go
+    to a thread, whatever STREAM_SERIALIZE_EXECUTOR is set to.
+    """
+
+    async def aput(self, config, checkpoint, metadata, new_versions):
+        """Store a checkpoint, serializing it in a worker thread if it is large."""
+        values = checkpoint.get("channel_values", {})
+        changed = [values[k] for k in new_versions if k in values]
+        if not STREAM_SERIALIZE_EXECUTOR or (
+            approximate_size(changed) < SERIALIZE_OFFLOAD_THRESHOLD
+        ):
+            return self.put(config, checkpoint, metadata, new_versions)
+
+        SERIALIZATION_METRICS["checkpoints_offloaded"] += 1
+        return await asyncio.to_thread(
+            self.put, config, checkpoint, metadata, new_versions
+        )
+
+    async def aput_writes(self, config, writes, task_id, task_path=""):
+        """Store pending writes, serializing them in a worker thread if they are large."""
+        if not STREAM_SERIALIZE_EXECUTOR or (
+            approximate_size([value for _, value in writes])
+            < SERIALIZE_OFFLOAD_THRESHOLD
+        ):
+            return self.put_writes(config, writes, task_id, task_path)
+
+        SERIALIZATION_METRICS["checkpoints_offloaded"] += 1
+        return await asyncio.to_thread(
+            self.put_writes, config, writes, task_id, task_path
+        )
+
+
+class LoopLagMonitor:
+    """Measure how late the event loop wakes up a sleeping task."""
+
+    def __init__(self, interval: float = LOOP_LAG_INTERVAL):
+        """Sample the loop lag every `interval` seconds once started."""
+        self.interval = interval
+        self._task: asyncio.Task | None = None
+
+    async def _run(self):
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            lag_ms = max(time.perf_counter() - started - self.interval, 0) * 1000
+            SERIALIZATION_METRICS["loop_lag_ms"] = round(lag_ms, 3)
+            SERIALIZATION_METRICS["loop_lag_max_ms"] = round(
+                max(SERIALIZATION_METRICS["loop_lag_max_ms"], lag_ms), 3
+            )
+
+    def start(self):
+        """Start probing the loop in the background."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop probing the loop."""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
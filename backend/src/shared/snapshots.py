@@ -0,0 +1,277 @@
+"""Compact binary snapshots of the in-memory thread checkpoints."""
+
+import asyncio
+import os
+import struct
+import threading
+import zlib
+from typing import Any, BinaryIO, Iterator
+
+import ormsgpack
+from langgraph.checkpoint.memory import InMemorySaver
+from src.shared.usage import UsageLedger
+
+# Snapshot file (empty disables snapshots) and seconds between snapshots
+SNAPSHOT_PATH = os.environ.get("SNAPSHOT_PATH", "")
+SNAPSHOT_INTERVAL = float(os.environ.get("SNAPSHOT_INTERVAL", "60"))
+# Rewrite the file from scratch once it grows past this factor of a full snapshot
+SNAPSHOT_COMPACT_FACTOR = 3
+
+MAGIC = b"BLKSNAP1"
+FRAME_HEADER = struct.Struct(">I")
+
+
+def _thread_record(graph_name: str, saver: InMemorySaver, thread_id: str, keys) -> dict:
+    """Copy one thread's checkpoints, writes and blobs out of the saver."""
+    write_keys, blob_keys = keys
+    checkpoints = []
+    for checkpoint_ns, ns_storage in list(saver.storage.get(thread_id, {}).items()):
+        for checkpoint_id, saved in dict(ns_storage).items():
+            checkpoints.append([checkpoint_ns, checkpoint_id, list(saved)])
+
+    writes = []
+    for outer_key in write_keys:
+        inner = dict(saver.writes.get(outer_key, {}))
+        writes.append(
+            [list(outer_key), [[list(k), list(v)] for k, v in inner.items()]]
+        )
+
+    blobs = [[list(k), list(saver.blobs[k])] for k in blob_keys if k in saver.blobs]
+    return {
+        "graph": graph_name,
+        "thread_id": thread_id,
+        "checkpoints": checkpoints,
+        "writes": writes,
+        "blobs": blobs,
+    }
+
+
+def _index_by_thread(saver: InMemorySaver) -> dict[str, tuple[list, list]]:
+    """Group the write and blob keys of the saver by thread id."""
+    index: dict[str, tuple[list, list]] = {
+        thread_id: ([], []) for thread_id in list(saver.storage)
+    }
+    for key in list(saver.writes):
+        index.setdefault(key[0], ([], []))[0].append(key)
+    for key in list(saver.blobs):
+        index.setdefault(key[0], ([], []))[1].append(key)
+    return index
+
+
+def _fingerprint(saver: InMemorySaver, thread_id: str, keys) -> tuple:
+    """Cheap summary of a thread that changes whenever the thread does."""
+    write_keys, blob_keys = keys
+    checkpoints = sum(len(ns) for ns in saver.storage.get(thread_id, {}).values())
+    writes = sum(len(saver.writes.get(key, {})) for key in write_keys)
+    return checkpoints, writes, len(blob_keys)
+
+
+def write_frame(file: BinaryIO, record: dict):
+    """Append one length-prefixed, compressed msgpack record."""
+    payload = zlib.compress(ormsgpack.packb(record))
+    file.write(FRAME_HEADER.pack(len(payload)))
+    file.write(payload)
+
+
+def read_frames(file: BinaryIO) -> Iterator[dict]:
+    """Yield the records of a snapshot file one at a time, stopping at a cut or corrupt frame."""
+    if file.read(len(MAGIC)) != MAGIC:
+        raise ValueError("Not a snapshot file")
+    frame_start = file.tell()
+    while header := file.read(FRAME_HEADER.size):
+        record = None
+        if len(header) == FRAME_HEADER.size:
+            (length,) = FRAME_HEADER.unpack(header)
+            payload = file.read(length)
+            if payload and len(payload) == length:
+                try:
+                    record = ormsgpack.unpackb(zlib.decompress(payload))
+                except (zlib.error, ormsgpack.MsgpackDecodeError):
+                    record = None
+        if not isinstance(record, dict):
+            # Frame cut short or damaged by a crash during a snapshot: stop before it
+            print(f"Snapshot frame at byte {frame_start} is unreadable, ignoring the rest")
+            file.seek(frame_start)
+            break
+        frame_start = file.tell()
+        yield record
+
+
+def restore_record(saver: InMemorySaver, record: dict):
+    """Upsert one thread record into the saver, or delete the thread of a tombstone."""
+    thread_id = record["thread_id"]
+    if record.get("deleted"):
+        saver.delete_thread(thread_id)
+        return
+    for checkpoint_ns, checkpoint_id, saved in record["checkpoints"]:
+        checkpoint, metadata, parent_id = saved
+        saver.storage[thread_id][checkpoint_ns][checkpoint_id] = (
+            tuple(checkpoint),
+            tuple(metadata),
+            parent_id,
+        )
+    for outer_key, inner in record["writes"]:
+        writes = saver.writes.setdefault(tuple(outer_key), {})
+        for inner_key, value in inner:
+            writes[tuple(inner_key)] = tuple(value)
+    for key, value in record["blobs"]:
+        saver.blobs[tuple(key)] = tuple(value)
+
+
+class SnapshotManager:
+    """Periodically stream the thread checkpoints of the graphs to one file.
+
+    Snapshots are incremental: only threads that changed since the previous
+    snapshot are appended, one compressed frame per thread, and restoring
+    replays the frames in order. Deleted threads get a tombstone frame, so
+    their older frames are not restored. Threads are copied one at a time in a worker
+    thread, so the event loop is not blocked and memory never holds a second
+    copy of every thread. The file is compacted once it grows too large.
+
+    The token usage ledger, when given, is written as its own frame whenever
+    it changed, so budgets are restored together with the threads.
+    """
+
+    def __init__(
+        self,
+        savers: dict[str, InMemorySaver],
+        path: str = SNAPSHOT_PATH,
+        interval: float = SNAPSHOT_INTERVAL,
+        ledger: UsageLedger | None = None,
+    ):
+        """Snapshot `savers` by graph name; nothing runs until `start()`."""
+        self.savers = savers
+        self.path = path
+        self.interval = interval
+        self.ledger = ledger
+        self._ledger_version: int | None = None
+        self.stats: dict[str, Any] = {"snapshots": 0, "threads_written": 0}
+        self._fingerprints: dict[tuple[str, str], tuple] = {}
+        self._compacted_size = 0
+        self._task: asyncio.Task | None = None
+        # Snapshots run in worker threads, never two on the file at once
+        self._file_lock = threading.Lock()
+
+    def restore(self) -> int:
+        """Load the snapshot file into the savers and return the number of thread records."""
+        if not os.path.exists(self.path):
+            return 0
+
+        count = 0
+        with open(self.path, "r+b") as file:
+            for record in read_frames(file):
+                if "usage" in record:
+                    if self.ledger is not None:
+                        self.ledger.load(record["usage"])
+                    continue
+                saver = self.savers.get(record.get("graph"))
+                if saver is not None:
+                    restore_record(saver, record)
+                    count += 1
+            # Drop a cut frame so the next snapshot appends after valid data
+            file.truncate(file.tell())
+
+        # The restored state is what the file holds, nothing to append yet
+        for graph_name, saver in self.savers.items():
+            for thread_id, keys in _index_by_thread(saver).items():
+                self._fingerprints[(graph_name, thread_id)] = _fingerprint(
+                    saver, thread_id, keys
+                )
+        if self.ledger is not None:
+            self._ledger_version = self.ledger.version
+        self._compacted_size = os.path.getsize(self.path)
+        return count
+
+    def snapshot(self) -> int:
+        """Write the threads changed since the last snapshot and return their count."""
+        with self._file_lock:
+            return self._snapshot()
+
+    def _snapshot(self) -> int:
+        exists = os.path.exists(self.path)
+        if exists and os.path.getsize(self.path) > max(
+            self._compacted_size * SNAPSHOT_COMPACT_FACTOR, 1 << 20
+        ):
+            return self._compact()
+
+        written = 0
+        with open(self.path, "ab") as file:
+            if not exists:
+                file.write(MAGIC)
+            written = self._write_threads(file, only_changed=exists)
+
+        self.stats["snapshots"] += 1
+        self.stats["threads_written"] += written
+        return written
+
+    def compact(self) -> int:
+        """Rewrite the snapshot file with every thread, replacing it atomically."""
+        with self._file_lock:
+            return self._compact()
+
+    def _compact(self) -> int:
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, "wb") as file:
+            file.write(MAGIC)
+            written = self._write_threads(file, only_changed=False)
+        os.replace(temp_path, self.path)
+
+        self._compacted_size = os.path.getsize(self.path)
+        self.stats["snapshots"] += 1
+        self.stats["threads_written"] += written
+        return written
+
+    def _write_threads(self, file: BinaryIO, only_changed: bool) -> int:
+        # Each ledger frame holds the whole ledger, restoring keeps the last one
+        if self.ledger is not None and (
+            not only_changed or self.ledger.version != self._ledger_version
+        ):
+            version = self.ledger.version
+            write_frame(file, {"usage": self.ledger.dump()})
+            self._ledger_version = version
+
+        written = 0
+        for graph_name, saver in self.savers.items():
+            index = _index_by_thread(saver)
+            for thread_id, keys in index.items():
+                fingerprint = _fingerprint(saver, thread_id, keys)
+                if (
+                    only_changed
+                    and self._fingerprints.get((graph_name, thread_id)) == fingerprint
+                ):
+                    continue
+                write_frame(file, _thread_record(graph_name, saver, thread_id, keys))
+                self._fingerprints[(graph_name, thread_id)] = fingerprint
+                written += 1
+
+            for key in [k for k in self._fingerprints if k[0] == graph_name]:
+                if key[1] not in index:
+                    # A full rewrite holds no older frame of the thread to cancel
+                    if only_changed:
+                        write_frame(
+                            file,
+                            {"graph": graph_name, "thread_id": key[1], "deleted": True},
+                        )
+                    del self._fingerprints[key]
+        return written
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await asyncio.to_thread(self.snapshot)
+            except Exception as e:
+                print(f"Snapshot to {self.path} failed: {e}")
+
+    def start(self):
+        """Start taking snapshots in the background."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the background snapshots and take a final one."""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await asyncio.to_thread(self.snapshot)
@@ -31,3 +31,7 @@ class GraphState(dict):
         default="",
         description="The current prompt.",
     )
+    variants: Annotated[list[dict], override_reducer] = Field(
+        default_factory=list,
+        description="Tested and evaluated prompt variants from the last exploration.",
+    )
@@ -0,0 +1,117 @@
+"""Paginated, projected reads of the checkpointed thread state."""
+
+import hashlib
+import json
+from typing import Any
+
+from fastapi import HTTPException, Request, Response
+from fastapi.responses import JSONResponse
+from langchain_core.load import dumpd
+
+
+def _has_tool_calls(message: Any) -> bool:
+    if isinstance(message, dict):
+        return bool(message.get("tool_calls")) or message.get("type") == "tool"
+    return (
+        bool(getattr(message, "tool_calls", None))
+        or getattr(message, "type", None) == "tool"
+    )
+
+
+def project_state(
+    values: dict[str, Any],
+    fields: list[str] | None = None,
+    last: int | None = None,
+    offset: int = 0,
+    limit: int = 50,
+    include_tool_calls: bool = True,
+) -> dict[str, Any]:
+    """Select the requested fields of a state and a page of its messages.
+
+    Args:
+        values: The thread state values
+        fields: State keys to return, all of them by default
+        last: Return only the last N messages (takes precedence over offset)
+        offset: Index of the first message to return
+        limit: Maximum number of messages to return
+        include_tool_calls: Whether to keep tool call and tool result messages
+
+    Returns:
+        dict: The projected values plus the message pagination
+    """
+    projected: dict[str, Any] = {}
+    for key, value in values.items():
+        if fields and key not in fields:
+            continue
+        if key != "messages":
+            projected[key] = dumpd(value)
+            continue
+
+        messages = value
+        if not include_tool_calls:
+            messages = [m for m in messages if not _has_tool_calls(m)]
+        if last is not None:
+            offset = max(len(messages) - last, 0)
+            limit = last
+
+        projected["messages"] = dumpd(messages[offset : offset + limit])
+        projected["messages_total"] = len(messages)
+        projected["messages_offset"] = offset
+
+    return projected
+
+
+async def query_thread_state(
+    graph,
+    thread_id: str,
+    request: Request,
+    fields: str | None = None,
+    last: int | None = None,
+    offset: int = 0,
+    limit: int = 50,
+    include_tool_calls: bool = True,
+) -> Response:
+    """Read the checkpointed state of a thread without running the graph.
+
+    The response carries an ETag derived from the checkpoint and the
+    projection, so a client sending it back in If-None-Match gets a 304 until
+    the thread moves on.
+
+    Args:
+        graph: The compiled graph owning the thread
+        thread_id: Thread to read
+        request: The incoming request (for If-None-Match)
+        fields: Comma separated state keys to return
+        last: Return only the last N messages
+        offset: Index of the first message to return
+        limit: Maximum number of messages to return
+        include_tool_calls: Whether to keep tool call and tool result messages
+
+    Returns:
+        Response: The projected state as JSON, or an empty 304
+    """
+    snapshot = await graph.aget_state({"configurable": {"thread_id": thread_id}})
+    checkpoint_id = snapshot.config.get("configurable", {}).get("checkpoint_id")
+    if checkpoint_id is None:
+        raise HTTPException(status_code=404, detail="Thread not found")
+
+    field_list = [f for f in fields.split(",") if f] if fields else None
+    projection = [checkpoint_id, field_list, last, offset, limit, include_tool_calls]
+    etag = '"' + hashlib.sha1(json.dumps(projection).encode()).hexdigest() + '"'
+
+    if etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers={"ETag": etag})
+
+    body = {
+        "thread_id": thread_id,
+        "checkpoint_id": checkpoint_id,
+        "next": list(snapshot.next),
+        "interrupts": [
+            {"id": interrupt.id, "value": dumpd(interrupt.value)}
+            for interrupt in snapshot.interrupts
+        ],
+        "values": project_state(
+            snapshot.values, field_list, last, offset, limit, include_tool_calls
+        ),
+    }
+    return JSONResponse(body, headers={"ETag": etag, "Cache-Control": "no-cache"})
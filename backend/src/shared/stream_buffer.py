@@ -0,0 +1,166 @@
+"""Bounded per-connection event buffer decoupling graph execution from socket writes."""
+
+import asyncio
+import os
+from collections import deque
+from typing import Awaitable, Callable, Literal, get_args
+
+from fastapi.responses import StreamingResponse
+
+SlowConsumerPolicy = Literal["block", "coalesce", "drop", "disconnect"]
+
+
+def validate_slow_consumer_policy(policy: str) -> SlowConsumerPolicy:
+    """Return `policy` if it is a known slow consumer policy, else raise ValueError."""
+    if policy not in get_args(SlowConsumerPolicy):
+        raise ValueError(
+            f"Unknown slow consumer policy {policy!r}, "
+            f"expected one of {', '.join(get_args(SlowConsumerPolicy))}"
+        )
+    return policy
+
+
+# Events buffered per connection before the slow consumer policy applies
+STREAM_QUEUE_SIZE = int(os.environ.get("STREAM_QUEUE_SIZE", "32"))
+# Seconds without events before a heartbeat is sent (0 disables heartbeats)
+STREAM_HEARTBEAT_SECONDS = float(os.environ.get("STREAM_HEARTBEAT_SECONDS", "15"))
+# Checked on import, so a typo stops the app from starting
+STREAM_SLOW_CONSUMER_POLICY = validate_slow_consumer_policy(
+    os.environ.get("STREAM_SLOW_CONSUMER_POLICY", "block")
+)
+
+STREAM_METRICS = {
+    "active_streams": 0,
+    "total_streams": 0,
+    "queue_high_water_mark": 0,
+    "heartbeats": 0,
+    "dropped_updates": 0,
+    "coalesced_updates": 0,
+    "slow_consumer_disconnects": 0,
+}
+
+
+class SlowConsumerError(Exception):
+    """Raised when a client falls too far behind under the disconnect policy."""
+
+
+class StreamBuffer:
+    """Bounded FIFO of serialized events for one connection.
+
+    Intermediate updates are subject to the slow consumer policy when the
+    buffer is full:
+
+    - block: wait for the client (backpressure on the graph)
+    - coalesce: drop the oldest pending intermediate update to make room
+    - drop: discard the new update and keep the pending ones
+    - disconnect: give up on the client
+
+    Essential events (interrupts, done and error) are never dropped.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = STREAM_QUEUE_SIZE,
+        policy: SlowConsumerPolicy = STREAM_SLOW_CONSUMER_POLICY,
+    ):
+        """Create an empty buffer holding up to `maxsize` events."""
+        self.maxsize = max(maxsize, 1)
+        self.policy = validate_slow_consumer_policy(policy)
+        self.high_water_mark = 0
+        self._items: deque[tuple[str, bool]] = deque()
+        self._closed = False
+        self._changed = asyncio.Condition()
+
+    async def put(self, event: str, essential: bool = False):
+        """Queue an event, applying the slow consumer policy when full."""
+        async with self._changed:
+            while len(self._items) >= self.maxsize:
+                if self.policy == "disconnect":
+                    STREAM_METRICS["slow_consumer_disconnects"] += 1
+                    raise SlowConsumerError("Client is not reading events fast enough")
+                if not essential and self.policy == "drop":
+                    STREAM_METRICS["dropped_updates"] += 1
+                    return
+                if self.policy == "coalesce" and self._drop_intermediate():
+                    continue
+                await self._changed.wait()
+
+            self._items.append((event, essential))
+            self.high_water_mark = max(self.high_water_mark, len(self._items))
+            STREAM_METRICS["queue_high_water_mark"] = max(
+                STREAM_METRICS["queue_high_water_mark"], self.high_water_mark
+            )
+            self._changed.notify_all()
+
+    async def close(self, final_event: str | None = None, discard: bool = False):
+        """Mark the end of the stream, optionally replacing what is pending."""
+        async with self._changed:
+            if discard:
+                self._items.clear()
+            if final_event is not None:
+                self._items.append((final_event, True))
+            self._closed = True
+            self._changed.notify_all()
+
+    async def get(self, timeout: float | None = None) -> str | None:
+        """Return the next event.
+
+        Returns:
+            str | None: The event, or None if `timeout` passed without events
+
+        Raises:
+            StopAsyncIteration: When the stream is closed and drained
+        """
+        async with self._changed:
+            if not self._items and not self._closed:
+                try:
+                    await asyncio.wait_for(self._changed.wait(), timeout)
+                except TimeoutError:
+                    return None
+            if not self._items:
+                if self._closed:
+                    raise StopAsyncIteration
+                return None
+
+            event, _ = self._items.popleft()
+            self._changed.notify_all()
+            return event
+
+    def _drop_intermediate(self) -> bool:
+        for idx, (_, essential) in enumerate(self._items):
+            if not essential:
+                del self._items[idx]
+                STREAM_METRICS["coalesced_updates"] += 1
+                return True
+        return False
+
+
+class ClosingStreamingResponse(StreamingResponse):
+    """Streaming response running a cleanup callback once its ASGI call ends.
+
+    The callback runs even when the client disconnects before the body is
+    iterated, when a `finally` inside the body generator would never run.
+    It receives whether the call failed.
+    """
+
+    def __init__(
+        self,
+        response: StreamingResponse,
+        on_close: Callable[[bool], Awaitable[None] | None],
+    ):
+        """Wrap `response`, calling `on_close` once its ASGI call ends."""
+        self.__dict__.update(response.__dict__)
+        # Wrapping a ClosingStreamingResponse keeps its callbacks, innermost first
+        self._close_callbacks = [*getattr(response, "_close_callbacks", ()), on_close]
+
+    async def __call__(self, scope, receive, send):
+        """Send the response, then run the close callbacks."""
+        failed = True
+        try:
+            await super().__call__(scope, receive, send)
+            failed = False
+        finally:
+            for on_close in self._close_callbacks:
+                result = on_close(failed)
+                if result is not None:
+                    await result
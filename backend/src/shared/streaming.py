@@ -1,48 +1,235 @@
 """Shared streaming utilities for graph execution."""
 
+import asyncio
 import json
+from contextlib import aclosing
 from typing import AsyncGenerator, Any
 
+from fastapi import WebSocket, WebSocketDisconnect
 from fastapi.responses import StreamingResponse
-from langchain_core.load import dumpd
+from langgraph.types import Command
+from src.shared.graph_pool import GraphPool, GraphPoolFull
+from src.shared.serialization import aserialize_update
+from src.shared.stream_buffer import (
+    STREAM_HEARTBEAT_SECONDS,
+    STREAM_METRICS,
+    SlowConsumerError,
+    StreamBuffer,
+)
+from src.shared.usage import (
+    TokenBudgetExceeded,
+    check_budget,
+    get_tenant_id,
+    thread_config,
+)
 
 
-async def create_graph_stream(graph, graph_input: Any, config: dict) -> StreamingResponse:
-    """
-    Create a streaming response for any LangChain graph execution.
+def error_event(error: Exception | str) -> str:
+    """Serialize the error event ending a failed run."""
+    return json.dumps({"type": "error", "error": str(error)})
+
+
+def is_error_event(event: str) -> bool:
+    """Tell whether a serialized event is an error event."""
+    return event.startswith('{"type": "error"')
+
+
+async def _graph_events(
+    graph, graph_input: Any, config: dict
+) -> AsyncGenerator[tuple[str, bool], None]:
+    """Run the graph and yield (event JSON, essential) pairs."""
+    try:
+        async for update in graph.astream(
+            graph_input, config, stream_mode=["updates", "custom"]
+        ):
+            mode, data = update
+            event = await aserialize_update(update)
+            # Interrupts carry what the client has to answer, never drop them
+            yield event, mode == "updates" and "__interrupt__" in data
+
+        # Send completion event
+        yield json.dumps({"type": "done"}), True
+
+    except Exception as e:
+        # Send error event
+        yield error_event(e), True
+
+
+async def iterate_graph_events(
+    graph,
+    graph_input: Any,
+    config: dict,
+    heartbeat: float = STREAM_HEARTBEAT_SECONDS,
+) -> AsyncGenerator[str | None, None]:
+    """Run the graph in its own task and yield every event as serialized JSON.
+
+    The graph writes into a bounded per-connection StreamBuffer, so a slow
+    client only holds back the graph according to the slow consumer policy.
 
     Args:
         graph: The LangChain graph to execute
         graph_input: Input data for the graph
         config: Configuration dictionary for the graph execution
+        heartbeat: Seconds without events before yielding a heartbeat
 
-    Returns:
-        StreamingResponse: FastAPI streaming response with SSE format
+    Yields:
+        str | None: The JSON of each update, followed by a done or error
+            event. None stands for a heartbeat.
     """
+    buffer = StreamBuffer()
 
-    async def generate_stream() -> AsyncGenerator[str, None]:
+    async def produce():
         try:
-            async for update in graph.astream(
-                graph_input, config, stream_mode=["updates"]
-            ):
-                # Convert update to JSON and send as SSE
-                update_data = dumpd(update)
-                yield f"data: {json.dumps(update_data)}\n\n"
+            async for event, essential in _graph_events(graph, graph_input, config):
+                await buffer.put(event, essential)
+            await buffer.close()
+        except SlowConsumerError as e:
+            await buffer.close(error_event(e), discard=True)
 
-            # Send completion event
-            yield f"data: {json.dumps({'type': 'done'})}\n\n"
+    producer = asyncio.create_task(produce())
+    STREAM_METRICS["active_streams"] += 1
+    STREAM_METRICS["total_streams"] += 1
+    try:
+        while True:
+            try:
+                event = await buffer.get(timeout=heartbeat or None)
+            except StopAsyncIteration:
+                break
+            if event is None:
+                STREAM_METRICS["heartbeats"] += 1
+            yield event
+    finally:
+        # The client went away or the stream ended: stop the graph task
+        producer.cancel()
+        STREAM_METRICS["active_streams"] -= 1
 
-        except Exception as e:
-            # Send error event
-            error_data = {"type": "error", "error": str(e)}
-            yield f"data: {json.dumps(error_data)}\n\n"
 
+def sse_response(
+    chunks: AsyncGenerator[str, None], headers: dict | None = None
+) -> StreamingResponse:
+    """Wrap already formatted SSE chunks in a streaming response."""
     return StreamingResponse(
-        generate_stream(),
+        chunks,
         media_type="text/event-stream",
         headers={
             "Cache-Control": "no-cache",
             "Connection": "keep-alive",
             "Content-Type": "text/event-stream; charset=utf-8",
+            # Never compressed, whatever the Starlette version excludes from GZip
+            "Content-Encoding": "identity",
+            **(headers or {}),
         },
-    )
\ No newline at end of file
+    )
+
+
+async def create_graph_stream(
+    graph, graph_input: Any, config: dict, recording=None
+) -> StreamingResponse:
+    """
+    Create a streaming response for any LangChain graph execution.
+
+    Args:
+        graph: The LangChain graph to execute
+        graph_input: Input data for the graph
+        config: Configuration dictionary for the graph execution
+        recording: Optional ResumeRecording receiving every SSE chunk sent
+
+    Returns:
+        StreamingResponse: FastAPI streaming response with SSE format
+    """
+
+    async def generate_stream() -> AsyncGenerator[str, None]:
+        complete = failed = False
+        try:
+            async for event in iterate_graph_events(graph, graph_input, config):
+                if event is None:
+                    # SSE comment keeping idle proxies from closing the connection
+                    yield ": heartbeat\n\n"
+                    continue
+
+                failed = is_error_event(event)
+                chunk = f"data: {event}\n\n"
+                if recording is not None:
+                    await recording.append(chunk)
+                yield chunk
+            # A failed run leaves the interrupt pending, a retry must run it again
+            complete = not failed
+        finally:
+            if recording is not None:
+                await recording.finish(complete)
+
+    return sse_response(generate_stream())
+
+
+def _text_field(message: dict, key: str) -> str:
+    """Return a string field of a WebSocket message, as the SSE input models require."""
+    value = message[key]
+    if not isinstance(value, str):
+        raise ValueError(f"'{key}' must be a string")
+    return value
+
+
+def parse_websocket_command(message: dict) -> Any:
+    """Convert a client WebSocket message into the graph input it stands for."""
+    message_type = message.get("type")
+    if message_type == "stream":
+        return {"messages": [{"content": _text_field(message, "input"), "type": "human"}]}
+    elif message_type == "resume":
+        return Command(resume=_text_field(message, "resume"))
+    elif message_type == "retry":
+        return None  # Input is None for a retry
+    raise ValueError(f"Unknown message type: {message_type}")
+
+
+async def _send_graph_events(websocket: WebSocket, graph, graph_input: Any, config: dict):
+    # Closed right away when a send fails, so a gone client stops the graph task
+    async with aclosing(iterate_graph_events(graph, graph_input, config)) as events:
+        async for event in events:
+            if event is None:
+                event = json.dumps({"type": "heartbeat"})
+            await websocket.send_text(event)
+
+
+async def run_graph_websocket(
+    websocket: WebSocket,
+    graph,
+    thread_id: str,
+    pool: GraphPool | None = None,
+    graph_name: str | None = None,
+):
+    """Serve a thread over one WebSocket connection.
+
+    The client sends {"type": "stream", "input": ...}, {"type": "resume",
+    "resume": ...} or {"type": "retry"} messages, and receives the same events
+    as the SSE endpoints, one JSON text frame per event.
+
+    Args:
+        websocket: The incoming WebSocket connection
+        graph: The LangChain graph to execute
+        thread_id: Thread the connection is bound to
+        pool: Optional pool bounding the concurrent runs of the graph
+        graph_name: Name the graph is registered under, scoping the thread usage
+    """
+    config = thread_config(thread_id, get_tenant_id(websocket), graph_name)
+    await websocket.accept()
+
+    try:
+        while True:
+            message = await websocket.receive_text()
+            try:
+                graph_input = parse_websocket_command(json.loads(message))
+                check_budget(config)
+            except (KeyError, ValueError, AttributeError, TokenBudgetExceeded) as e:
+                await websocket.send_text(error_event(e))
+                continue
+
+            try:
+                if pool is None:
+                    await _send_graph_events(websocket, graph, graph_input, config)
+                else:
+                    async with pool.run():
+                        await _send_graph_events(websocket, graph, graph_input, config)
+            except GraphPoolFull as e:
+                await websocket.send_text(error_event(e))
+    except WebSocketDisconnect:
+        print(f"WebSocket closed for thread_id: {thread_id}")
@@ -0,0 +1,89 @@
+"""Registry-based dispatch of the tool calls of a message."""
+
+import asyncio
+from dataclasses import dataclass
+from typing import Any, Callable
+
+from langchain_core.messages import AIMessage
+from langchain_core.tools import BaseTool
+from langgraph.types import Command, Send
+
+
+@dataclass(frozen=True)
+class ToolHandler:
+    """How a tool supervisor runs one tool."""
+
+    tool: BaseTool
+    # Builds the tool input from the tool call args and the message that made the call
+    build_input: Callable[[dict, AIMessage], dict]
+    # Tools that call interrupt() must run one at a time, in tool call order,
+    # the others run concurrently
+    interrupts: bool
+
+
+async def run_tool_calls(
+    last_message: AIMessage, handlers: dict[str, ToolHandler]
+) -> list[Any]:
+    """Run every tool call of a message through its registered handler.
+
+    Tools that do not interrupt run concurrently. Interrupting tools run
+    sequentially in tool call order, so each resume value is matched to the
+    same interrupt when the node is replayed.
+
+    Args:
+        last_message: Message holding the tool calls
+        handlers: Tool name -> handler registry
+
+    Returns:
+        list: Tool results, in tool call order
+    """
+    calls = []
+    for tool_call in last_message.tool_calls:
+        handler = handlers.get(tool_call["name"])
+        if handler is None:
+            raise ValueError(f"Unknown tool name: {tool_call['name']}")
+        calls.append((handler, handler.build_input(tool_call["args"], last_message)))
+
+    results: list[Any] = [None] * len(calls)
+
+    concurrent = [idx for idx, (handler, _) in enumerate(calls) if not handler.interrupts]
+    concurrent_results = await asyncio.gather(
+        *(calls[idx][0].tool.ainvoke(calls[idx][1]) for idx in concurrent)
+    )
+    for idx, result in zip(concurrent, concurrent_results):
+        results[idx] = result
+
+    for idx, (handler, tool_input) in enumerate(calls):
+        if handler.interrupts:
+            results[idx] = await handler.tool.ainvoke(tool_input)
+
+    return results
+
+
+def merge_commands(commands: list[Command | None]) -> Command:
+    """Merge the Commands returned by several tools into one.
+
+    Updates are applied in tool call order: "messages" are concatenated and
+    any other key keeps the value of the last tool setting it. The gotos of
+    all tools are kept, in tool call order and without duplicates, so every
+    route a user chose runs: several of them fan out in the next step.
+    """
+    gotos: list[str | Send] = []
+    update: dict[str, Any] = {}
+
+    for command in commands:
+        if command is None:
+            continue
+        goto = command.goto
+        for target in [goto] if isinstance(goto, (str, Send)) else goto or ():
+            if target not in gotos:
+                gotos.append(target)
+        for key, value in (command.update or {}).items():
+            if key == "messages":
+                update["messages"] = update.get("messages", []) + list(value)
+            else:
+                update[key] = value
+
+    if not gotos:
+        return Command(update=update)
+    return Command(goto=gotos[0] if len(gotos) == 1 else gotos, update=update)
@@ -0,0 +1,102 @@
+"""Incremental parsing of streamed tool-call arguments."""
+
+import json
+from typing import Any
+
+from langchain_core.messages import AIMessage, message_chunk_to_message
+from langgraph.config import get_stream_writer
+from pydantic import BaseModel, ValidationError
+from src.shared.state import Question
+
+
+class QuestionStreamParser:
+    """Extract complete questions from the partial JSON of ask_questions_tool args.
+
+    The arguments arrive in fragments like '{"questions": [{"quest' and
+    'ion": "..."}, {'. Every object that closes inside the top-level array is
+    returned as soon as its closing brace arrives, once it validates against
+    the question model of the graph.
+    """
+
+    def __init__(self, question_model: type[BaseModel] = Question):
+        """Start an empty parser validating questions against `question_model`."""
+        self.question_model = question_model
+        self.text = ""
+        self._position = 0
+        self._stack: list[str] = []
+        self._in_string = False
+        self._escaped = False
+        self._item_start: int | None = None
+
+    def feed(self, fragment: str) -> list[dict[str, Any]]:
+        """Add an arguments fragment and return the questions completed by it."""
+        self.text += fragment
+        completed = []
+
+        for idx in range(self._position, len(self.text)):
+            char = self.text[idx]
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char in "{[":
+                if char == "{" and self._stack == ["{", "["]:
+                    self._item_start = idx
+                self._stack.append(char)
+            elif char in "}]" and self._stack:
+                self._stack.pop()
+                if char == "}" and self._stack == ["{", "["] and self._item_start is not None:
+                    question = self._parse_item(self.text[self._item_start : idx + 1])
+                    if question is not None:
+                        completed.append(question)
+                    self._item_start = None
+
+        self._position = len(self.text)
+        return completed
+
+    def _parse_item(self, item: str) -> dict[str, Any] | None:
+        try:
+            return self.question_model.model_validate(json.loads(item)).model_dump()
+        except (ValueError, ValidationError):
+            return None
+
+
+async def astream_questions(
+    llm_with_tools, model_input: Any, question_model: type[BaseModel] = Question
+) -> AIMessage:
+    """Call the model, streaming each ask_questions_tool question as soon as it is complete.
+
+    Questions are sent through the graph custom stream as
+    {"type": "question", "index": int, "question": {...}} events.
+
+    Args:
+        llm_with_tools: Chat model bound to ask_questions_tool
+        model_input: Input for the model
+        question_model: Question model of the graph's ask_questions_tool
+
+    Returns:
+        AIMessage: The complete response with its parsed tool calls
+    """
+    writer = get_stream_writer()
+    parsers: dict[int, QuestionStreamParser] = {}
+    emitted = 0
+
+    response = None
+    async for chunk in llm_with_tools.astream(model_input):
+        response = chunk if response is None else response + chunk
+
+        for tool_call_chunk in chunk.tool_call_chunks:
+            parser = parsers.setdefault(
+                tool_call_chunk.get("index") or 0,
+                QuestionStreamParser(question_model),
+            )
+            for question in parser.feed(tool_call_chunk.get("args") or ""):
+                writer({"type": "question", "index": emitted, "question": question})
+                emitted += 1
+
+    return message_chunk_to_message(response)
@@ -0,0 +1,197 @@
+"""Token usage accounting and budget enforcement per thread and tenant."""
+
+import os
+from collections import defaultdict
+from typing import Any
+
+from fastapi import HTTPException
+from langchain_core.callbacks import BaseCallbackHandler
+from starlette.requests import HTTPConnection
+
+# Request header identifying the tenant
+TENANT_HEADER = os.environ.get("TENANT_HEADER", "X-Tenant-ID")
+# Token budgets (0 means unlimited)
+THREAD_TOKEN_BUDGET = int(os.environ.get("THREAD_TOKEN_BUDGET", "0"))
+TENANT_TOKEN_BUDGET = int(os.environ.get("TENANT_TOKEN_BUDGET", "0"))
+
+DEFAULT_TENANT = "default"
+
+
+class TokenBudgetExceeded(Exception):
+    """Raised when a thread or tenant has used up its token budget."""
+
+
+def _empty_usage() -> dict[str, int]:
+    return {
+        "input_tokens": 0,
+        "output_tokens": 0,
+        "total_tokens": 0,
+        "cache_read_tokens": 0,
+        "cache_creation_tokens": 0,
+        "calls": 0,
+    }
+
+
+def _cache_hit_ratio(usage: dict[str, int]) -> float | None:
+    """Share of the input tokens served from the provider prompt cache."""
+    if not usage["input_tokens"]:
+        return None
+    return round(usage["cache_read_tokens"] / usage["input_tokens"], 4)
+
+
+def thread_key(thread_id: str, graph_name: str | None = None) -> str:
+    """Key of a thread in the ledger, so graphs sharing a thread id never share a budget."""
+    return f"{graph_name}:{thread_id}" if graph_name else thread_id
+
+
+class UsageLedger:
+    """Tokens consumed per thread and per tenant, fed by usage_metadata.
+
+    Threads are keyed by thread_key. The ledger is written to the checkpoint
+    snapshots with dump() and restored with load(), so budgets survive a
+    restart together with the threads.
+    """
+
+    def __init__(
+        self,
+        thread_budget: int = THREAD_TOKEN_BUDGET,
+        tenant_budget: int = TENANT_TOKEN_BUDGET,
+    ):
+        """Create an empty ledger enforcing the given token budgets."""
+        self.thread_budget = thread_budget
+        self.tenant_budget = tenant_budget
+        self.threads: dict[str, dict[str, int]] = defaultdict(_empty_usage)
+        self.tenants: dict[str, dict[str, int]] = defaultdict(_empty_usage)
+        # Bumped on every change, so snapshots only write a changed ledger
+        self.version = 0
+
+    def record(self, thread_id: str, tenant_id: str, usage_metadata: dict[str, Any]):
+        """Add the usage of one model call to the thread and tenant totals."""
+        # Prompt prefix cache hits and writes, reported by providers that cache
+        input_details = usage_metadata.get("input_token_details") or {}
+        for usage in (self.threads[thread_id], self.tenants[tenant_id]):
+            usage["calls"] += 1
+            for key in ("input_tokens", "output_tokens", "total_tokens"):
+                usage[key] += usage_metadata.get(key, 0) or 0
+            usage["cache_read_tokens"] += input_details.get("cache_read", 0) or 0
+            usage["cache_creation_tokens"] += input_details.get("cache_creation", 0) or 0
+        self.version += 1
+
+    def check(self, thread_id: str, tenant_id: str):
+        """Raise TokenBudgetExceeded if the thread or tenant is over budget."""
+        thread_used = self.threads.get(thread_id, {}).get("total_tokens", 0)
+        if self.thread_budget and thread_used >= self.thread_budget:
+            raise TokenBudgetExceeded(
+                f"Thread {thread_id} used {thread_used} of {self.thread_budget} tokens"
+            )
+
+        tenant_used = self.tenants.get(tenant_id, {}).get("total_tokens", 0)
+        if self.tenant_budget and tenant_used >= self.tenant_budget:
+            raise TokenBudgetExceeded(
+                f"Tenant {tenant_id} used {tenant_used} of {self.tenant_budget} tokens"
+            )
+
+    def dump(self) -> dict[str, dict[str, dict[str, int]]]:
+        """Return a copy of the thread and tenant totals."""
+        return {
+            "threads": {key: dict(usage) for key, usage in list(self.threads.items())},
+            "tenants": {key: dict(usage) for key, usage in list(self.tenants.items())},
+        }
+
+    def load(self, state: dict[str, dict[str, dict[str, int]]]):
+        """Replace the thread and tenant totals with the ones of dump()."""
+        for name in ("threads", "tenants"):
+            totals: dict[str, dict[str, int]] = defaultdict(_empty_usage)
+            for key, usage in state.get(name, {}).items():
+                totals[key] = {**_empty_usage(), **usage}
+            setattr(self, name, totals)
+        self.version += 1
+
+    def report(self, usage: dict[str, int] | None, budget: int) -> dict[str, Any]:
+        """Return the usage together with its budget and what is left of it."""
+        usage = dict(usage or _empty_usage())
+        usage["budget"] = budget or None
+        usage["remaining"] = max(budget - usage["total_tokens"], 0) if budget else None
+        usage["cache_hit_ratio"] = _cache_hit_ratio(usage)
+        return usage
+
+    def cache_report(self) -> dict[str, Any]:
+        """Return the prompt cache usage summed over every tenant."""
+        totals = _empty_usage()
+        for usage in list(self.tenants.values()):
+            for key in totals:
+                totals[key] += usage[key]
+        return {
+            "input_tokens": totals["input_tokens"],
+            "cache_read_tokens": totals["cache_read_tokens"],
+            "cache_creation_tokens": totals["cache_creation_tokens"],
+            "cache_hit_ratio": _cache_hit_ratio(totals),
+            "calls": totals["calls"],
+        }
+
+
+LEDGER = UsageLedger()
+
+
+class UsageCallbackHandler(BaseCallbackHandler):
+    """Record the usage of every model call of a run and stop it once over budget."""
+
+    raise_error = True
+    run_inline = True
+
+    def __init__(self, thread_id: str, tenant_id: str, ledger: UsageLedger = LEDGER):
+        """Record the usage of one thread of `tenant_id` into `ledger`."""
+        self.thread_id = thread_id
+        self.tenant_id = tenant_id
+        self.ledger = ledger
+
+    def on_chat_model_start(self, serialized, messages, **kwargs: Any) -> None:
+        """Refuse the model call if the budget is already used up."""
+        self.ledger.check(self.thread_id, self.tenant_id)
+
+    def on_llm_end(self, response, **kwargs: Any) -> None:
+        """Record the usage_metadata of the model response."""
+        for generations in response.generations:
+            for generation in generations:
+                message = getattr(generation, "message", None)
+                usage_metadata = getattr(message, "usage_metadata", None)
+                if usage_metadata:
+                    self.ledger.record(self.thread_id, self.tenant_id, usage_metadata)
+
+
+def get_tenant_id(connection: HTTPConnection) -> str:
+    """Read the tenant of a request or WebSocket from the tenant header."""
+    return connection.headers.get(TENANT_HEADER) or DEFAULT_TENANT
+
+
+def thread_config(
+    thread_id: str, tenant_id: str = DEFAULT_TENANT, graph_name: str | None = None
+) -> dict:
+    """Return the graph config of a thread, with usage accounting attached."""
+    return {
+        "configurable": {
+            "thread_id": thread_id,
+            "tenant_id": tenant_id,
+            "graph_name": graph_name,
+        },
+        "callbacks": [
+            UsageCallbackHandler(thread_key(thread_id, graph_name), tenant_id)
+        ],
+    }
+
+
+def check_budget(config: dict):
+    """Raise TokenBudgetExceeded if the thread or tenant of a config is over budget."""
+    configurable = config["configurable"]
+    LEDGER.check(
+        thread_key(configurable["thread_id"], configurable.get("graph_name")),
+        configurable.get("tenant_id", DEFAULT_TENANT),
+    )
+
+
+def enforce_budget(config: dict):
+    """Reject the request with a 429 if its thread or tenant is over budget."""
+    try:
+        check_budget(config)
+    except TokenBudgetExceeded as e:
+        raise HTTPException(status_code=429, detail=str(e))
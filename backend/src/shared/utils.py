@@ -7,6 +7,7 @@ from langchain_core.messages import (
     BaseMessage,
     HumanMessage,
     SystemMessage,
+    ToolCall,
     ToolMessage,
 )
 from langchain_core.tools import tool
@@ -34,11 +35,50 @@ def ask_questions_tool(questions: List[Question], last_message: Any) -> Any:
     )
 
 
-@tool(description="Tool to create a prompt.")
-def create_prompt_tool(prompt: str, last_message: Any) -> Any:
-    next_step = interrupt({"prompt": prompt})
+def selected_variant_index(next_step: str, variants: list[dict]) -> int | None:
+    """Return the variant index of a "select:<n>" answer, or None if it is invalid."""
+    index = next_step.removeprefix("select:")
+    if not index.isdigit() or int(index) >= len(variants):
+        return None
+    return int(index)
 
-    if next_step == "questions":
+
+@tool(description="Tool to create a prompt.")
+def create_prompt_tool(
+    prompt: str, last_message: Any, variants: list[dict] | None = None
+) -> Any:
+    payload = {"prompt": prompt}
+    if variants:
+        payload["variants"] = variants
+    next_step = interrupt(payload)
+
+    # Ask again until a "select:<n>" answer names one of the variants
+    while next_step.startswith("select:") and (
+        not variants or selected_variant_index(next_step, variants) is None
+    ):
+        print(f"Ignoring invalid variant selection: {next_step}")
+        next_step = interrupt(payload)
+
+    if next_step.startswith("select:"):
+        # Present the chosen variant as the current prompt
+        selected = variants[selected_variant_index(next_step, variants)]["prompt"]
+        tool_call = ToolCall(
+            name="create_prompt_tool",
+            args={"prompt": selected},
+            id="manual_select_call_1",
+        )
+        return Command(
+            goto="tool_supervisor",
+            update={
+                "messages": [AIMessage(content="", tool_calls=[tool_call])],
+                "prompt": HumanMessage(content=selected),
+            },
+        )
+    elif next_step == "explore":
+        return Command(
+            goto="explore_variants",
+        )
+    elif next_step == "questions":
         return Command(
             goto="ask_questions_node",
         )
@@ -105,46 +145,80 @@ def suggest_improvements_tool(improvements: list[str], last_message: Any) -> Any
     # return Command(goto="generate_or_improve_prompt", update={"messages": [ai_message]})
 
 
+@tool(
+    description="Tool to judge a prompt result. Args: score: int (1-10). feedback: str (Feedback to improve the prompt)"
+)
+def judge_result_tool(score: int, feedback: str) -> Any:
+    """Tool to return the judgement of the headless optimizer (never invoked)."""
+
+
+def _format_human(message: HumanMessage) -> str:
+    return f"Human: {message.content}"
+
+
+def _format_ai(message: AIMessage) -> str:
+    ai_content = f"AI: {message.content}"
+    # Include tool calls if present
+    if message.tool_calls:
+        tool_calls_str = ", ".join(
+            f"{tc.get('name', 'unknown')}({tc.get('args', {})})"
+            for tc in message.tool_calls
+        )
+        ai_content += f" [Tool calls: {tool_calls_str}]"
+    return ai_content
+
+
+def _format_system(message: SystemMessage) -> str:
+    return f"System: {message.content}"
+
+
+def _format_tool(message: ToolMessage) -> str:
+    # Include tool name if available
+    tool_name = (
+        getattr(message, "name", None)
+        or getattr(message, "tool", None)
+        or "unknown_tool"
+    )
+    return f"Tool[{tool_name}]: {message.content}"
+
+
+def _format_other(message: Any) -> str:
+    # fallback for unknown or custom message types
+    content = getattr(message, "content", None)
+    if content is None and isinstance(message, dict):
+        content = message.get("content")
+    return f"{message.__class__.__name__}: {content or ''}"
+
+
+# Formatter per exact message class, extended with subclasses on first use
+_MESSAGE_FORMATTERS: dict[type, Any] = {
+    HumanMessage: _format_human,
+    AIMessage: _format_ai,
+    SystemMessage: _format_system,
+    ToolMessage: _format_tool,
+}
+
+
 def format_message(message: BaseMessage) -> str:
     """Format a single message into a readable string."""
-    if isinstance(message, HumanMessage):
-        return f"Human: {message.content}"
-    elif isinstance(message, AIMessage):
-        ai_content = f"AI: {message.content}"
-        # Include tool calls if present
-        if hasattr(message, "tool_calls") and message.tool_calls:
-            tool_calls_str = ", ".join(
-                [
-                    f"{tc.get('name', 'unknown')}({tc.get('args', {})})"
-                    for tc in message.tool_calls
-                ]
-            )
-            ai_content += f" [Tool calls: {tool_calls_str}]"
-        return ai_content
-    elif isinstance(message, SystemMessage):
-        return f"System: {message.content}"
-    elif isinstance(message, ToolMessage):
-        # Include tool name if available
-        tool_name = (
-            getattr(message, "name", None)
-            or getattr(message, "tool", None)
-            or "unknown_tool"
+    message_class = type(message)
+    formatter = _MESSAGE_FORMATTERS.get(message_class)
+    if formatter is None:
+        formatter = next(
+            (
+                _MESSAGE_FORMATTERS[base]
+                for base in message_class.__mro__[1:]
+                if base in _MESSAGE_FORMATTERS
+            ),
+            _format_other,
         )
-        return f"Tool[{tool_name}]: {message.content}"
-    else:
-        # fallback for unknown or custom message types
-        print("fallback", message)
-        return f"{message.__class__.__name__}: {message['content']}"
+        _MESSAGE_FORMATTERS[message_class] = formatter
+    return formatter(message)
 
 
 def get_formatted_messages(messages: list[BaseMessage]) -> str:
     """Return a readable transcript showing roles, including tool names for ToolMessages."""
-    lines = []
-    messages = normalize_messages(messages)
-    for m in messages:
-        print("message", m)
-        lines.append(format_message(m))
-    return "\n".join(lines)
+    return "\n".join(map(format_message, normalize_messages(messages)))
 
 
 def format_questions_with_answers(
@@ -165,19 +239,24 @@ def format_questions_with_answers(
     return questions_with_answers
 
 
+# A mapping from string type to the corresponding class
+MESSAGE_CLASS_MAP = {
+    "human": HumanMessage,
+    "ai": AIMessage,
+    "system": SystemMessage,
+    "tool": ToolMessage,
+}
+
+
 def normalize_messages(messages: list) -> list[BaseMessage]:
     """Converts a list of mixed message representations (dicts and objects)
     into a list of BaseMessage objects.
     """
-    normalized = []
-    # A mapping from string type to the corresponding class
-    message_class_map = {
-        "human": HumanMessage,
-        "ai": AIMessage,
-        "system": SystemMessage,
-        "tool": ToolMessage,
-    }
+    # Messages coming out of the graph state are already objects
+    if all(isinstance(msg, BaseMessage) for msg in messages):
+        return messages if isinstance(messages, list) else list(messages)
 
+    normalized = []
     for msg in messages:
         if isinstance(msg, BaseMessage):
             # It's already a proper message object, just add it.
@@ -185,18 +264,14 @@ def normalize_messages(messages: list) -> list[BaseMessage]:
         elif isinstance(msg, dict):
             # It's a dictionary, so we need to convert it.
             msg_type = msg.get("type")
-            constructor = message_class_map.get(msg_type)
+            constructor = MESSAGE_CLASS_MAP.get(msg_type)
 
             if not constructor:
                 warnings.warn(f"Unknown message type in dict: '{msg_type}'. Skipping.")
                 continue
 
-            # Create a copy of the dict and remove 'type' as it's not a constructor argument
-            params = msg.copy()
-            params.pop("type", None)
-
-            # Create the message object using the remaining dictionary items as keyword arguments
-            normalized.append(constructor(**params))
+            # The message classes accept their own 'type', no need to copy the dict
+            normalized.append(constructor(**msg))
         else:
             warnings.warn(f"Unknown item in messages list: {type(msg)}. Skipping.")
 
@@ -0,0 +1,84 @@
+"""Micro-benchmarks of the per-request message helpers, with regression thresholds.
+
+Each helper is timed as the best of several repeats, and the thresholds sit
+roughly 10x above the times measured on a developer laptop, so only real
+regressions (like losing a fast path) fail them.
+"""
+
+import time
+
+import pytest
+from langchain_core.messages import AIMessage, AIMessageChunk, HumanMessage
+from src.shared.serialization import aserialize_update
+from src.shared.state import override_reducer
+from src.shared.utils import format_message, get_formatted_messages, normalize_messages
+
+pytestmark = pytest.mark.benchmark
+
+MESSAGES = [
+    HumanMessage(content=f"message {idx}")
+    if idx % 2
+    else AIMessage(
+        content=f"reply {idx}",
+        tool_calls=[{"name": "create_prompt_tool", "args": {"prompt": "p"}, "id": str(idx)}],
+    )
+    for idx in range(200)
+]
+DICT_MESSAGES = [{"type": "human", "content": f"message {idx}"} for idx in range(200)]
+
+
+def best_time(func, number: int = 50, repeat: int = 5) -> float:
+    """Return the best average seconds per call over `repeat` rounds of `number` calls."""
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _ in range(number):
+            func()
+        best = min(best, (time.perf_counter() - started) / number)
+    return best
+
+
+def test_normalize_messages_skips_message_objects():
+    assert normalize_messages(MESSAGES) is MESSAGES
+    assert best_time(lambda: normalize_messages(MESSAGES)) < 1e-3
+
+
+def test_normalize_messages_converts_dicts():
+    normalized = normalize_messages(DICT_MESSAGES)
+
+    assert all(isinstance(message, HumanMessage) for message in normalized)
+    assert best_time(lambda: normalize_messages(DICT_MESSAGES), number=10) < 15e-3
+
+
+def test_format_message_dispatch():
+    chunk = AIMessageChunk(content="partial")
+
+    assert format_message(chunk) == "AI: partial"
+    assert format_message({"content": "raw"}) == "dict: raw"
+    assert best_time(lambda: format_message(MESSAGES[0]), number=1000) < 50e-6
+
+
+def test_get_formatted_messages():
+    transcript = get_formatted_messages(MESSAGES)
+
+    assert transcript.count("\n") == len(MESSAGES) - 1
+    assert best_time(lambda: get_formatted_messages(MESSAGES), number=10) < 5e-3
+
+
+def test_override_reducer():
+    assert override_reducer(MESSAGES, {"type": "override", "value": []}) == []
+    assert best_time(lambda: override_reducer(MESSAGES, MESSAGES[:1]), number=1000) < 50e-6
+
+
+async def test_aserialize_update():
+    update = ("updates", {"node": {"messages": MESSAGES[:20]}})
+
+    number = 50
+    best = float("inf")
+    for _ in range(5):
+        started = time.perf_counter()
+        for _ in range(number):
+            await aserialize_update(update)
+        best = min(best, (time.perf_counter() - started) / number)
+
+    assert best < 15e-3
@@ -0,0 +1,79 @@
+"""Tests that streaming responses are not held back by GZip compression."""
+
+import asyncio
+
+from fastapi import FastAPI
+from fastapi.middleware.gzip import GZipMiddleware
+from src.shared.batch import create_ndjson_stream
+from src.shared.streaming import sse_response
+
+
+async def _lines(count: int):
+    for idx in range(count):
+        await asyncio.sleep(0)
+        yield {"index": idx, "result": "x" * 200}
+
+
+def _app() -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(GZipMiddleware, minimum_size=10)
+
+    @app.get("/ndjson")
+    async def ndjson():
+        return create_ndjson_stream(_lines(10))
+
+    @app.get("/sse")
+    async def sse():
+        async def chunks():
+            for idx in range(10):
+                yield f"data: {idx}\n\n"
+
+        return sse_response(chunks())
+
+    return app
+
+
+async def _send(app, path: str) -> tuple[dict, list[bytes]]:
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": b"",
+        "root_path": "",
+        "headers": [(b"accept-encoding", b"gzip")],
+        "client": ("test", 1),
+        "server": ("test", 80),
+    }
+    messages = []
+
+    async def receive():
+        await asyncio.sleep(1)
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        messages.append(message)
+
+    await app(scope, receive, send)
+    headers = {k.decode(): v.decode() for k, v in messages[0]["headers"]}
+    bodies = [m["body"] for m in messages[1:] if m.get("body")]
+    return headers, bodies
+
+
+async def test_ndjson_lines_are_sent_uncompressed_as_they_complete():
+    headers, bodies = await _send(_app(), "/ndjson")
+
+    assert headers.get("content-encoding") != "gzip"
+    # 10 results and the done line, each in its own chunk
+    assert len(bodies) == 11
+    assert all(body.endswith(b"\n") for body in bodies)
+
+
+async def test_event_stream_is_not_compressed():
+    headers, bodies = await _send(_app(), "/sse")
+
+    assert headers.get("content-encoding") != "gzip"
+    assert len(bodies) == 10
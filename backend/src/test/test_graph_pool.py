@@ -0,0 +1,63 @@
+"""Tests for the per-graph run pools."""
+
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+from fastapi.responses import StreamingResponse
+from src.shared.graph_pool import GraphPool
+from starlette.requests import ClientDisconnect
+
+
+async def _response():
+    async def body():
+        yield "data: 1\n\n"
+
+    return StreamingResponse(body())
+
+
+async def _call(response, disconnected: bool = False):
+    """Send a response over ASGI, optionally to a client already gone."""
+    sent = []
+
+    async def receive():
+        if disconnected:
+            return {"type": "http.disconnect"}
+        await asyncio.sleep(1)
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        if disconnected:
+            raise OSError("client disconnected")
+        sent.append(message)
+
+    scope = {"type": "http", "asgi": {"version": "3.0", "spec_version": "2.4"}}
+    try:
+        await response(scope, receive, send)
+    except (OSError, ClientDisconnect):
+        pass
+    return sent
+
+
+async def test_rejects_when_full():
+    pool = GraphPool("test", max_concurrency=1, queue_timeout=0.01)
+    response = await pool.stream(_response)
+
+    with pytest.raises(HTTPException) as error:
+        await pool.stream(_response)
+
+    assert error.value.status_code == 503
+    await _call(response)
+    assert pool.metrics["active"] == 0
+    assert pool.metrics["rejected"] == 1
+
+
+async def test_slot_released_when_client_leaves_before_body():
+    pool = GraphPool("test", max_concurrency=1, queue_timeout=0.01)
+
+    for _ in range(3):
+        response = await pool.stream(_response)
+        await _call(response, disconnected=True)
+
+    assert pool.metrics["active"] == 0
+    assert pool.metrics["runs"] == 3
@@ -0,0 +1,42 @@
+"""Tests for the generic graph thread endpoints."""
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from src.routers import graph_router
+
+
+@pytest.fixture
+def client(monkeypatch):
+    async def query_thread_state(graph, thread_id, request, **params):
+        return params
+
+    monkeypatch.setattr(graph_router, "get_graph", lambda name: None)
+    monkeypatch.setattr(graph_router, "query_thread_state", query_thread_state)
+    app = FastAPI()
+    app.include_router(graph_router.create_graph_router("paging"))
+    return TestClient(app)
+
+
+def test_state_pagination_defaults(client):
+    response = client.get("/graphs/paging/threads/t1/state")
+
+    assert response.status_code == 200
+    assert response.json()["offset"] == 0
+    assert response.json()["limit"] == 50
+
+
+@pytest.mark.parametrize(
+    "query",
+    [
+        "offset=-1",
+        "limit=-1",
+        "last=-1",
+        f"limit={graph_router.MAX_STATE_PAGE_SIZE + 1}",
+        f"last={graph_router.MAX_STATE_PAGE_SIZE + 1}",
+    ],
+)
+def test_state_pagination_out_of_range_is_rejected(client, query):
+    response = client.get(f"/graphs/paging/threads/t1/state?{query}")
+
+    assert response.status_code == 422
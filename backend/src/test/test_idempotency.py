@@ -0,0 +1,140 @@
+"""Tests for the deduplication of resume requests."""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+from src.shared import idempotency
+from src.shared.idempotency import ResumeCache, idempotent_resume
+from starlette.requests import ClientDisconnect
+
+
+class FakeGraph:
+    """Graph paused at an interrupt, moving to the next one after each run."""
+
+    def __init__(self, delay: float = 0, fail: bool = False):
+        self.delay = delay
+        self.fail = fail
+        self.runs = 0
+        self.interrupt = 1
+
+    async def aget_state(self, config):
+        return SimpleNamespace(
+            interrupts=[SimpleNamespace(id=f"interrupt-{self.interrupt}")]
+        )
+
+    async def astream(self, graph_input, config, stream_mode=None):
+        self.runs += 1
+        await asyncio.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError("provider unavailable")
+        yield ("updates", {"node": {"result": f"run {self.runs}"}})
+        self.interrupt += 1
+
+
+async def _body(response) -> str:
+    return "".join([chunk async for chunk in response.body_iterator])
+
+
+@pytest.fixture(autouse=True)
+def resume_cache(monkeypatch):
+    monkeypatch.setattr(idempotency, "RESUME_CACHE", ResumeCache())
+
+
+def _config():
+    return {"configurable": {"thread_id": "thread-1"}}
+
+
+async def test_duplicate_resume_is_replayed():
+    graph = FakeGraph()
+    first = await _body(
+        await idempotent_resume(graph, _config(), "test", interrupt_id="interrupt-1")
+    )
+    # The thread has moved on, the interrupt id still identifies the duplicate
+    replay = await idempotent_resume(
+        graph, _config(), "test", interrupt_id="interrupt-1"
+    )
+
+    assert replay.headers["Idempotent-Replayed"] == "true"
+    assert await _body(replay) == first
+    assert graph.runs == 1
+
+
+async def test_same_answer_to_the_next_interrupt_runs():
+    graph = FakeGraph()
+    await _body(await idempotent_resume(graph, _config(), "explore"))
+    second = await idempotent_resume(graph, _config(), "explore")
+
+    assert "Idempotent-Replayed" not in second.headers
+    assert "run 2" in await _body(second)
+
+    third = await idempotent_resume(
+        graph, _config(), "explore", interrupt_id="interrupt-3"
+    )
+    assert "run 3" in await _body(third)
+    assert graph.runs == 3
+
+
+async def test_answered_interrupt_is_rejected_once_expired(monkeypatch):
+    monkeypatch.setattr(idempotency, "IDEMPOTENCY_TTL_SECONDS", 0)
+    graph = FakeGraph()
+    await _body(
+        await idempotent_resume(graph, _config(), "test", interrupt_id="interrupt-1")
+    )
+    await asyncio.sleep(0.01)
+
+    with pytest.raises(HTTPException) as error:
+        await idempotent_resume(graph, _config(), "test", interrupt_id="interrupt-1")
+
+    assert error.value.status_code == 409
+    assert graph.runs == 1
+
+
+async def test_running_resume_is_not_purged_after_ttl(monkeypatch):
+    monkeypatch.setattr(idempotency, "IDEMPOTENCY_TTL_SECONDS", 0.01)
+    graph = FakeGraph(delay=0.1)
+
+    original = asyncio.create_task(
+        _body(await idempotent_resume(graph, _config(), "test"))
+    )
+    await asyncio.sleep(0.05)
+    duplicate = await idempotent_resume(graph, _config(), "test")
+
+    assert await _body(duplicate) == await original
+    assert graph.runs == 1
+
+
+async def test_failed_resume_is_not_cached():
+    graph = FakeGraph(fail=True)
+    body = await _body(await idempotent_resume(graph, _config(), "test"))
+    assert '"type": "error"' in body
+
+    graph.fail = False
+    retry = await idempotent_resume(graph, _config(), "test")
+
+    assert "Idempotent-Replayed" not in retry.headers
+    assert '"type": "done"' in await _body(retry)
+    assert graph.runs == 2
+
+
+async def test_resume_never_sent_is_not_replayed():
+    graph = FakeGraph()
+    response = await idempotent_resume(graph, _config(), "test")
+
+    async def receive():
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        raise OSError("client disconnected")
+
+    scope = {"type": "http", "asgi": {"version": "3.0", "spec_version": "2.4"}}
+    try:
+        await response(scope, receive, send)
+    except (OSError, ClientDisconnect):
+        pass
+
+    retry = await idempotent_resume(graph, _config(), "test")
+
+    assert "Idempotent-Replayed" not in retry.headers
+    assert '"type": "done"' in await asyncio.wait_for(_body(retry), 1)
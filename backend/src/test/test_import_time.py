@@ -0,0 +1,44 @@
+"""Test that the app imports fast, without building graphs or chat models."""
+
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parents[2]
+# Seconds the import of the app may take, far above the ~1s measured locally
+IMPORT_TIME_BUDGET = 5.0
+
+SCRIPT = """
+import json, sys, time
+started = time.perf_counter()
+import src.main
+elapsed = time.perf_counter() - started
+from src.graphs import registry
+providers = ["langchain_ollama", "langchain_openai", "langchain_google_genai"]
+print(json.dumps({
+    "elapsed": elapsed,
+    "graphs": list(registry._graphs),
+    "providers": [name for name in providers if name in sys.modules],
+}))
+"""
+
+
+def test_app_import_is_lazy_and_within_budget(tmp_path):
+    env = {key: value for key, value in os.environ.items() if key != "LLM_MODEL"}
+
+    # Run from an empty directory so no .env provides LLM_MODEL
+    output = subprocess.run(
+        [sys.executable, "-c", SCRIPT],
+        cwd=tmp_path,
+        env={**env, "PYTHONPATH": str(BACKEND_DIR)},
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    result = json.loads(output.stdout.strip().splitlines()[-1])
+
+    assert result["graphs"] == []
+    assert result["providers"] == []
+    assert result["elapsed"] < IMPORT_TIME_BUDGET
@@ -0,0 +1,91 @@
+"""Tests for the Ollama warm-up and keep-alive against a stub server."""
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import pytest
+from src.shared.keepalive import OllamaKeepAlive
+
+COLD_LOAD_NS = 900_000_000
+WARM_LOAD_NS = 20_000_000
+EVAL_NS = 5_000_000
+
+
+class StubOllama(BaseHTTPRequestHandler):
+    """Answer /api/generate like Ollama: a slow load on the first call per model."""
+
+    calls: list[dict] = []
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        if self.path != "/api/generate" or body["model"] == "missing":
+            self._reply(404, {"error": f"model '{body['model']}' not found"})
+            return
+
+        cold = not any(call["model"] == body["model"] for call in self.calls)
+        self.calls.append(body)
+        self._reply(
+            200,
+            {
+                "model": body["model"],
+                "created_at": "2024-01-01T00:00:00Z",
+                "response": "",
+                "done": True,
+                "load_duration": COLD_LOAD_NS if cold else WARM_LOAD_NS,
+                "eval_duration": EVAL_NS,
+                "total_duration": COLD_LOAD_NS + EVAL_NS,
+            },
+        )
+
+    def _reply(self, status: int, payload: dict):
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def ollama_host():
+    StubOllama.calls = []
+    server = HTTPServer(("127.0.0.1", 0), StubOllama)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+    server.server_close()
+
+
+async def test_ping_records_load_and_eval_times(ollama_host):
+    keepalive = OllamaKeepAlive(["llama3"], host=ollama_host, keep_alive="5m")
+
+    await keepalive.warm_up()
+    stats = await keepalive.ping("llama3")
+
+    request = StubOllama.calls[0]
+    assert (request["model"], request["prompt"], request["keep_alive"]) == (
+        "llama3",
+        "",
+        "5m",
+    )
+    assert stats["status"] == "loaded"
+    assert stats["pings"] == 2
+    assert stats["cold_loads"] == 1
+    assert stats["load_ms"] == WARM_LOAD_NS / 1e6
+    assert stats["eval_ms"] == EVAL_NS / 1e6
+
+
+async def test_ping_error_is_recorded(ollama_host):
+    keepalive = OllamaKeepAlive(["llama3", "missing"], host=ollama_host)
+
+    await keepalive.warm_up()
+
+    assert keepalive.stats["llama3"]["status"] == "loaded"
+    assert keepalive.stats["missing"]["status"] == "error"
+    assert "not found" in keepalive.stats["missing"]["error"]
+    assert keepalive.stats["missing"]["pings"] == 0
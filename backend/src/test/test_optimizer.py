@@ -0,0 +1,79 @@
+"""Tests for the headless optimization stopping rules and job queue."""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from langgraph.checkpoint.memory import InMemorySaver
+from src.shared import optimizer
+from src.shared.optimizer import (
+    OptimizationIteration,
+    OptimizationJob,
+    OptimizationQueue,
+    OptimizationSettings,
+    job_thread_id,
+    should_stop,
+)
+
+
+def _job(scores: list[int], **settings) -> OptimizationJob:
+    job = OptimizationJob(goal="a goal", settings=OptimizationSettings(**settings))
+    job.iterations = [
+        OptimizationIteration(prompt="p", result="r", score=score, feedback="f")
+        for score in scores
+    ]
+    return job
+
+
+@pytest.mark.parametrize(
+    "scores, settings, reason",
+    [
+        ([], {}, None),
+        ([5, 9], {"score_threshold": 9}, "score_threshold"),
+        ([5, 6, 7], {"max_iterations": 3, "patience": 5}, "max_iterations"),
+        ([5, 6, 7], {"max_iterations": 5, "patience": 2}, None),
+        ([7, 5, 6], {"patience": 2}, "plateau"),
+        ([5, 5, 6], {"patience": 2, "min_improvement": 2}, "plateau"),
+        ([5, 5, 7], {"patience": 2, "min_improvement": 2}, None),
+    ],
+)
+def test_should_stop(scores, settings, reason):
+    assert should_stop(_job(scores, **settings)) == reason
+
+
+class FinishedGraph:
+    """Graph checkpointing one step of the job thread and finishing."""
+
+    def __init__(self):
+        self.checkpointer = InMemorySaver()
+
+    async def ainvoke(self, graph_input, config):
+        thread_id = config["configurable"]["thread_id"]
+        self.checkpointer.storage[thread_id][""]["checkpoint"] = (
+            ("msgpack", b"checkpoint"),
+            ("msgpack", b"metadata"),
+            None,
+        )
+
+    async def aget_state(self, config):
+        return SimpleNamespace(interrupts=[])
+
+
+async def test_finished_job_frees_its_thread_and_expires(monkeypatch):
+    graph = FinishedGraph()
+    monkeypatch.setattr(optimizer, "get_graph", lambda name: graph)
+    monkeypatch.setattr(optimizer, "get_chat_model", lambda: None)
+    queue = OptimizationQueue(workers=1, job_ttl=0.05)
+
+    job = queue.submit(OptimizationJob(goal="a goal"))
+    await asyncio.wait_for(queue._queue.join(), 1)
+
+    assert job.status == "done"
+    assert job.stop_reason == "finished"
+    assert job_thread_id(job) not in graph.checkpointer.storage
+    assert queue.get_job(job.id) is job
+
+    await asyncio.sleep(0.1)
+    assert queue.get_job(job.id) is None
+    assert queue.list_jobs() == []
+    await queue.stop()
@@ -0,0 +1,51 @@
+"""Tests for the prompts split into a cacheable system part and a human part."""
+
+import re
+import string
+
+import pytest
+from src.shared import prompts
+from src.shared.prompts import SplitPrompt
+
+PROMPTS = {
+    name: value
+    for name, value in vars(prompts).items()
+    if isinstance(value, SplitPrompt)
+}
+PLACEHOLDER = re.compile(r"\{[A-Za-z_][A-Za-z0-9_]*\}")
+
+
+def _fields(template: str) -> set[str]:
+    return {field for _, field, _, _ in string.Formatter().parse(template) if field}
+
+
+def test_all_prompts_are_collected():
+    assert {"CLARIFY_PROMPT", "PROMPT_TEMPLATE", "JUDGE_PROMPT"} <= PROMPTS.keys()
+
+
+@pytest.mark.parametrize("name", sorted(PROMPTS))
+def test_system_part_has_no_placeholders(name):
+    # The system part is sent as is, a placeholder there would never be filled
+    assert PLACEHOLDER.findall(PROMPTS[name].system) == []
+
+
+def test_literal_examples_survive_in_the_system_part():
+    messages = prompts.CLARIFY_PROMPT.messages(prompt="p", missing_info="m")
+
+    assert '{"id": "q1", "question": ' in messages[0][1]
+    assert messages[0][1] == prompts.CLARIFY_PROMPT.system
+
+
+@pytest.mark.parametrize("name", sorted(PROMPTS))
+def test_messages_are_system_then_formatted_human(name):
+    prompt = PROMPTS[name]
+    values = {field: f"<value of {field}>" for field in _fields(prompt.human)}
+
+    messages = prompt.messages(**values)
+
+    assert [role for role, _ in messages] == ["system", "human"]
+    assert messages[0][1] == prompt.system
+    assert messages[1][1] == prompt.human.format(**values)
+    for value in values.values():
+        assert value in messages[1][1]
+    assert PLACEHOLDER.findall(messages[1][1]) == []
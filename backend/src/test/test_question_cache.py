@@ -0,0 +1,115 @@
+"""Tests for the similarity cache of clarifying questions."""
+
+import json
+
+import pytest
+from langchain_core.messages import AIMessage, AIMessageChunk, HumanMessage
+from langgraph.graph import START, StateGraph
+from src.graphs import prompt_graph
+from src.shared.question_cache import QuestionCache
+from src.shared.state import GraphState
+
+INPUT = "Write a prompt that summarizes customer support tickets for the weekly report"
+QUESTIONS = [{"question": "Which product line?", "options": None}]
+
+
+def test_similar_input_is_served_from_cache():
+    cache = QuestionCache(threshold=0.8, maxsize=8)
+    cache.put(INPUT, QUESTIONS, "acme")
+
+    assert cache.get(INPUT + ".", "acme") == QUESTIONS
+    assert cache.get("Translate this poem into French", "acme") is None
+
+
+def test_entries_are_kept_per_tenant():
+    cache = QuestionCache(threshold=0.8, maxsize=8)
+    cache.put(INPUT, QUESTIONS, "acme")
+
+    assert cache.get(INPUT, "globex") is None
+    assert cache.stats == {"hits": 0, "misses": 1, "evictions": 0}
+
+
+def test_shared_cache_serves_every_tenant():
+    cache = QuestionCache(threshold=0.8, maxsize=8, shared=True)
+    cache.put(INPUT, QUESTIONS, "acme")
+
+    assert cache.get(INPUT, "globex") == QUESTIONS
+
+
+def test_eviction_is_least_recently_used_across_tenants():
+    cache = QuestionCache(threshold=0.8, maxsize=2)
+    cache.put(INPUT, QUESTIONS, "acme")
+    cache.put(INPUT, QUESTIONS, "globex")
+    cache.get(INPUT, "acme")
+    cache.put(INPUT, QUESTIONS, "initech")
+
+    assert len(cache) == 2
+    assert cache.get(INPUT, "acme") == QUESTIONS
+    assert cache.get(INPUT, "globex") is None
+    assert all(tenant != "globex" for tenant, _ in cache._buckets)
+
+
+class QuestionModel:
+    """Chat model stub streaming one ask_questions_tool call per input."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def bind_tools(self, tools):
+        return self
+
+    async def astream(self, model_input):
+        self.calls += 1
+        args = json.dumps({"questions": [{"question": f"Question {self.calls}?"}]})
+        yield AIMessageChunk(
+            content="",
+            tool_call_chunks=[
+                {"name": "ask_questions_tool", "args": args, "id": "call", "index": 0}
+            ],
+        )
+
+
+@pytest.fixture
+def ask_questions(monkeypatch):
+    """Run ask_questions_node alone with a stub model and an empty cache."""
+    llm = QuestionModel()
+    monkeypatch.setattr(prompt_graph, "get_chat_model", lambda: llm)
+    monkeypatch.setattr(prompt_graph, "QUESTION_CACHE", QuestionCache(threshold=0.8))
+
+    builder = StateGraph(GraphState)
+    builder.add_node("ask_questions_node", prompt_graph.ask_questions_node)
+    builder.add_node("tool_supervisor", lambda state: {})
+    builder.add_edge(START, "ask_questions_node")
+    graph = builder.compile()
+
+    async def run(text: str, thread_id: str) -> list:
+        state = {
+            "messages": [HumanMessage(content=text), AIMessage(content="")],
+            "prompt": HumanMessage(content=text),
+        }
+        config = {"configurable": {"thread_id": thread_id, "tenant_id": "acme"}}
+        result = await graph.ainvoke(state, config)
+        return result["messages"][-1].tool_calls[0]["args"]["questions"]
+
+    run.llm = llm
+    return run
+
+
+async def test_node_misses_for_distinct_short_inputs(ask_questions):
+    first = await ask_questions("summarize this article", "thread-1")
+    second = await ask_questions("translate this article", "thread-2")
+
+    assert ask_questions.llm.calls == 2
+    assert first != second
+
+
+async def test_node_serves_other_threads_but_not_its_own(ask_questions):
+    first = await ask_questions("summarize this article for me", "thread-1")
+    # The same thread refining its prompt gets new questions
+    refined = await ask_questions("summarize this article for me.", "thread-1")
+    assert ask_questions.llm.calls == 2
+    assert refined != first
+
+    other = await ask_questions("summarize this article for me", "thread-2")
+    assert ask_questions.llm.calls == 2
+    assert other in (first, refined)
@@ -0,0 +1,79 @@
+"""Benchmark of the event loop lag while large and small sessions stream together."""
+
+import asyncio
+import time
+
+import pytest
+from langchain_core.messages import HumanMessage
+from src.shared import serialization
+from src.shared.serialization import (
+    SERIALIZATION_METRICS,
+    LoopLagMonitor,
+    aserialize_update,
+    shutdown_serialize_executor,
+)
+
+pytestmark = pytest.mark.benchmark
+
+LARGE_UPDATE = (
+    "updates",
+    {"node": {"messages": [HumanMessage(content="x" * 200 + str(i)) for i in range(5000)]}},
+)
+SMALL_UPDATE = ("updates", {"node": {"messages": [HumanMessage(content="hello")]}})
+
+
+async def _mixed_sessions() -> tuple[float, float]:
+    """Serialize large and small sessions together, return (max lag ms, slowest small session ms)."""
+    SERIALIZATION_METRICS["loop_lag_max_ms"] = 0.0
+    monitor = LoopLagMonitor(interval=0.005)
+    monitor.start()
+    await asyncio.sleep(0.02)
+
+    small_durations = []
+    started = time.perf_counter()
+
+    async def small_session():
+        for _ in range(10):
+            await aserialize_update(SMALL_UPDATE)
+            await asyncio.sleep(0.005)
+        small_durations.append(time.perf_counter() - started)
+
+    await asyncio.gather(
+        *(aserialize_update(LARGE_UPDATE) for _ in range(3)),
+        *(small_session() for _ in range(3)),
+    )
+    await asyncio.sleep(0.02)
+    await monitor.stop()
+    return SERIALIZATION_METRICS["loop_lag_max_ms"], max(small_durations) * 1000
+
+
+async def _measure(monkeypatch, executor: str) -> tuple[float, float]:
+    monkeypatch.setattr(serialization, "STREAM_SERIALIZE_EXECUTOR", executor)
+    monkeypatch.setattr(serialization, "SERIALIZE_OFFLOAD_THRESHOLD", 64 * 1024)
+    shutdown_serialize_executor()
+    try:
+        # Start the workers before measuring
+        if executor:
+            await aserialize_update(LARGE_UPDATE)
+        return await _mixed_sessions()
+    finally:
+        shutdown_serialize_executor()
+
+
+async def test_offloading_keeps_event_loop_responsive(monkeypatch):
+    inline_lag, inline_small = await _measure(monkeypatch, "")
+    thread_lag, thread_small = await _measure(monkeypatch, "thread")
+    process_lag, process_small = await _measure(monkeypatch, "process")
+
+    print(
+        f"\nmax loop lag ms: inline {inline_lag:.1f}, thread {thread_lag:.1f}, "
+        f"process {process_lag:.1f}"
+        f"\nslowest small session ms: inline {inline_small:.1f}, thread {thread_small:.1f}, "
+        f"process {process_small:.1f}"
+    )
+    # Inline, the loop stalls for every large serialization in a row. A thread
+    # still competes with the loop for the GIL and a process still pickles the
+    # payload on the loop, so the margin allows for a busy machine.
+    assert thread_lag < inline_lag * 0.75
+    assert process_lag < inline_lag * 0.75
+    assert thread_small < inline_small
@@ -0,0 +1,113 @@
+"""Tests for the checkpoint snapshot file."""
+
+import asyncio
+import threading
+
+from langgraph.checkpoint.memory import InMemorySaver
+from src.shared.snapshots import MAGIC, SnapshotManager
+from src.shared.usage import UsageLedger
+
+
+def _saver_with_threads(count: int) -> InMemorySaver:
+    saver = InMemorySaver()
+    for idx in range(count):
+        saver.storage[f"thread-{idx}"][""][f"checkpoint-{idx}"] = (
+            ("msgpack", b"checkpoint"),
+            ("msgpack", b"metadata"),
+            None,
+        )
+    return saver
+
+
+def test_restore_stops_at_corrupt_frame(tmp_path):
+    path = tmp_path / "snapshot.bin"
+    SnapshotManager({"main": _saver_with_threads(3)}, str(path)).snapshot()
+
+    data = bytearray(path.read_bytes())
+    # Damage the payload of the last frame
+    data[-3] ^= 0xFF
+    path.write_bytes(bytes(data))
+
+    saver = InMemorySaver()
+    restored = SnapshotManager({"main": saver}, str(path)).restore()
+
+    assert restored == 2
+    assert len(saver.storage) == 2
+    assert path.stat().st_size < len(data)
+
+
+def test_restore_stops_at_cut_frame(tmp_path):
+    path = tmp_path / "snapshot.bin"
+    SnapshotManager({"main": _saver_with_threads(2)}, str(path)).snapshot()
+    path.write_bytes(path.read_bytes()[:-5])
+
+    restored = SnapshotManager({"main": InMemorySaver()}, str(path)).restore()
+
+    assert restored == 1
+
+
+async def test_stop_waits_for_running_snapshot(tmp_path):
+    path = tmp_path / "snapshot.bin"
+    manager = SnapshotManager({"main": _saver_with_threads(2)}, str(path), interval=0)
+
+    running = []
+    overlapped = threading.Event()
+    original = manager._snapshot
+
+    def slow_snapshot():
+        if running:
+            overlapped.set()
+        running.append(True)
+        try:
+            threading.Event().wait(0.1)
+            return original()
+        finally:
+            running.pop()
+
+    manager._snapshot = slow_snapshot
+    manager.start()
+    await asyncio.sleep(0.02)
+    await manager.stop()
+
+    assert not overlapped.is_set()
+    assert path.read_bytes().startswith(MAGIC)
+    assert SnapshotManager({"main": InMemorySaver()}, str(path)).restore() == 2
+
+
+def test_usage_ledger_is_restored_with_the_threads(tmp_path):
+    path = tmp_path / "snapshot.bin"
+    ledger = UsageLedger()
+    ledger.record("main:thread-0", "acme", {"total_tokens": 15})
+    manager = SnapshotManager(
+        {"main": _saver_with_threads(1)}, str(path), ledger=ledger
+    )
+    manager.snapshot()
+    ledger.record("main:thread-0", "acme", {"total_tokens": 5})
+    manager.snapshot()
+    # Nothing changed, neither the ledger nor the thread is written again
+    size = path.stat().st_size
+    manager.snapshot()
+    assert path.stat().st_size == size
+
+    restored_ledger = UsageLedger()
+    restored = SnapshotManager(
+        {"main": InMemorySaver()}, str(path), ledger=restored_ledger
+    ).restore()
+
+    assert restored == 1
+    assert restored_ledger.threads["main:thread-0"]["total_tokens"] == 20
+    assert restored_ledger.tenants["acme"]["calls"] == 2
+
+
+def test_deleted_thread_is_not_restored(tmp_path):
+    path = tmp_path / "snapshot.bin"
+    saver = _saver_with_threads(2)
+    manager = SnapshotManager({"main": saver}, str(path))
+    manager.snapshot()
+    saver.delete_thread("thread-0")
+    manager.snapshot()
+
+    restored_saver = InMemorySaver()
+    SnapshotManager({"main": restored_saver}, str(path)).restore()
+
+    assert list(restored_saver.storage) == ["thread-1"]
@@ -0,0 +1,131 @@
+"""Tests for the per-connection event buffer and its slow consumer policies."""
+
+import asyncio
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+from src.shared.stream_buffer import STREAM_METRICS, SlowConsumerError, StreamBuffer
+from src.shared.streaming import iterate_graph_events
+
+BACKEND_DIR = Path(__file__).resolve().parents[2]
+
+
+async def _drain(buffer: StreamBuffer) -> list[str]:
+    await buffer.close()
+    events = []
+    while True:
+        try:
+            events.append(await buffer.get())
+        except StopAsyncIteration:
+            return events
+
+
+async def test_block_waits_for_the_client():
+    buffer = StreamBuffer(maxsize=1, policy="block")
+    await buffer.put("a")
+
+    put = asyncio.create_task(buffer.put("b"))
+    await asyncio.sleep(0.01)
+    assert not put.done()
+
+    assert await buffer.get() == "a"
+    await asyncio.wait_for(put, 1)
+    assert await _drain(buffer) == ["b"]
+
+
+async def test_coalesce_drops_the_oldest_intermediate_update():
+    coalesced = STREAM_METRICS["coalesced_updates"]
+    buffer = StreamBuffer(maxsize=2, policy="coalesce")
+    await buffer.put("a")
+    await buffer.put("interrupt", essential=True)
+    await buffer.put("b")
+
+    assert await _drain(buffer) == ["interrupt", "b"]
+    assert STREAM_METRICS["coalesced_updates"] == coalesced + 1
+
+
+async def test_drop_discards_the_new_update():
+    dropped = STREAM_METRICS["dropped_updates"]
+    buffer = StreamBuffer(maxsize=1, policy="drop")
+    await buffer.put("a")
+    await asyncio.wait_for(buffer.put("b"), 1)
+
+    assert await _drain(buffer) == ["a"]
+    assert STREAM_METRICS["dropped_updates"] == dropped + 1
+
+
+async def test_disconnect_gives_up_on_the_client():
+    disconnects = STREAM_METRICS["slow_consumer_disconnects"]
+    buffer = StreamBuffer(maxsize=1, policy="disconnect")
+    await buffer.put("a")
+
+    with pytest.raises(SlowConsumerError):
+        await buffer.put("b")
+    assert STREAM_METRICS["slow_consumer_disconnects"] == disconnects + 1
+
+
+@pytest.mark.parametrize("policy", ["coalesce", "drop"])
+async def test_essential_events_are_never_dropped(policy):
+    buffer = StreamBuffer(maxsize=1, policy=policy)
+    await buffer.put("interrupt", essential=True)
+
+    # Nothing can make room, the essential event waits for the client
+    done = asyncio.create_task(buffer.put("done", essential=True))
+    await asyncio.sleep(0.01)
+    assert not done.done()
+
+    assert await buffer.get() == "interrupt"
+    await asyncio.wait_for(done, 1)
+    assert await _drain(buffer) == ["done"]
+
+
+async def test_get_returns_none_on_timeout():
+    buffer = StreamBuffer()
+
+    assert await buffer.get(timeout=0.01) is None
+
+
+async def test_heartbeat_while_the_graph_is_quiet():
+    class SlowGraph:
+        async def astream(self, graph_input, config, stream_mode=None):
+            await asyncio.sleep(0.05)
+            yield ("updates", {"node": {"result": "ok"}})
+
+    heartbeats = STREAM_METRICS["heartbeats"]
+    events = [
+        event
+        async for event in iterate_graph_events(SlowGraph(), None, {}, heartbeat=0.01)
+    ]
+
+    assert events[0] is None
+    assert events[-1] == '{"type": "done"}'
+    assert STREAM_METRICS["heartbeats"] - heartbeats == events.count(None)
+
+
+async def test_high_water_mark():
+    buffer = StreamBuffer(maxsize=5)
+    for event in "abc":
+        await buffer.put(event)
+    await buffer.get()
+    await buffer.put("d")
+
+    assert buffer.high_water_mark == 3
+    assert STREAM_METRICS["queue_high_water_mark"] >= 3
+
+
+def test_unknown_policy_is_rejected():
+    with pytest.raises(ValueError, match="blok"):
+        StreamBuffer(policy="blok")
+
+    result = subprocess.run(
+        [sys.executable, "-c", "import src.shared.stream_buffer"],
+        cwd=BACKEND_DIR,
+        env={**os.environ, "STREAM_SLOW_CONSUMER_POLICY": "blok"},
+        capture_output=True,
+        text=True,
+    )
+    assert result.returncode != 0
+    assert "Unknown slow consumer policy 'blok'" in result.stderr
@@ -0,0 +1,160 @@
+"""Tests for the registry-based dispatch of tool calls."""
+
+import asyncio
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.tools import tool
+from langgraph.checkpoint.memory import InMemorySaver
+from langgraph.graph import START, StateGraph
+from langgraph.types import Command, Send
+from src.graphs import prompt_graph
+from src.shared.state import GraphState
+from src.shared.tool_dispatch import ToolHandler, merge_commands, run_tool_calls
+
+EVENTS: list[str] = []
+
+
+@tool
+async def slow_tool(name: str) -> str:
+    """Finish after a short wait."""
+    EVENTS.append(f"start {name}")
+    await asyncio.sleep(0.1)
+    EVENTS.append(f"end {name}")
+    return name
+
+
+def _message(*calls: tuple[str, str]) -> AIMessage:
+    return AIMessage(
+        content="",
+        tool_calls=[
+            {"name": name, "args": {"name": arg}, "id": f"call-{idx}"}
+            for idx, (name, arg) in enumerate(calls)
+        ],
+    )
+
+
+def _handlers(interrupts: bool) -> dict[str, ToolHandler]:
+    return {
+        "slow_tool": ToolHandler(
+            slow_tool, lambda args, message: args, interrupts=interrupts
+        )
+    }
+
+
+@pytest.fixture(autouse=True)
+def events():
+    EVENTS.clear()
+    return EVENTS
+
+
+async def test_results_follow_tool_call_order():
+    handlers = {
+        "concurrent": ToolHandler(slow_tool, lambda args, message: args, interrupts=False),
+        "sequential": ToolHandler(slow_tool, lambda args, message: args, interrupts=True),
+    }
+    message = AIMessage(
+        content="",
+        tool_calls=[
+            {"name": "sequential", "args": {"name": "a"}, "id": "1"},
+            {"name": "concurrent", "args": {"name": "b"}, "id": "2"},
+            {"name": "sequential", "args": {"name": "c"}, "id": "3"},
+            {"name": "concurrent", "args": {"name": "d"}, "id": "4"},
+        ],
+    )
+
+    assert await run_tool_calls(message, handlers) == ["a", "b", "c", "d"]
+
+
+async def test_non_interrupting_handlers_run_concurrently(events):
+    message = _message(("slow_tool", "a"), ("slow_tool", "b"), ("slow_tool", "c"))
+
+    started = asyncio.get_running_loop().time()
+    await run_tool_calls(message, _handlers(interrupts=False))
+    elapsed = asyncio.get_running_loop().time() - started
+
+    assert events[:3] == ["start a", "start b", "start c"]
+    assert elapsed < 0.25
+
+
+async def test_interrupting_handlers_run_one_at_a_time(events):
+    message = _message(("slow_tool", "a"), ("slow_tool", "b"))
+
+    await run_tool_calls(message, _handlers(interrupts=True))
+
+    assert events == ["start a", "end a", "start b", "end b"]
+
+
+async def test_unknown_tool_name_is_rejected(events):
+    message = _message(("slow_tool", "a"), ("missing_tool", "b"))
+
+    with pytest.raises(ValueError, match="missing_tool"):
+        await run_tool_calls(message, _handlers(interrupts=False))
+    # Nothing runs when one of the calls cannot be dispatched
+    assert events == []
+
+
+def test_merge_keeps_every_goto_and_update():
+    merged = merge_commands(
+        [
+            Command(goto="ask_questions_node", update={"messages": ["a"], "result": 1}),
+            None,
+            Command(update={"messages": ["b"]}),
+            Command(goto=["test_prompt", "ask_questions_node"], update={"result": 2}),
+            Command(goto=Send("generate_variant", {})),
+        ]
+    )
+
+    assert merged.goto == [
+        "ask_questions_node",
+        "test_prompt",
+        Send("generate_variant", {}),
+    ]
+    assert merged.update == {"messages": ["a", "b"], "result": 2}
+
+
+def test_merge_single_goto_and_no_goto():
+    assert merge_commands([None, Command(goto="test_prompt")]).goto == "test_prompt"
+    assert merge_commands([Command(update={"result": 1})]) == Command(
+        update={"result": 1}
+    )
+
+
+async def test_supervisor_runs_every_answered_route():
+    visited = []
+
+    def visit(name):
+        def node(state):
+            visited.append(name)
+            return {}
+
+        return node
+
+    builder = StateGraph(GraphState)
+    builder.add_node("tool_supervisor", prompt_graph.tool_supervisor)
+    # Every destination the supervisor declares has to exist
+    for name in (
+        "ask_questions_node",
+        "test_prompt",
+        "autoimprove",
+        "evaluate_prompt_node",
+        "generate_or_improve_prompt",
+        "explore_variants",
+    ):
+        builder.add_node(name, visit(name))
+    builder.add_edge(START, "tool_supervisor")
+    graph = builder.compile(checkpointer=InMemorySaver())
+    config = {"configurable": {"thread_id": "two-prompts"}}
+
+    calls = [
+        {"name": "create_prompt_tool", "args": {"prompt": prompt}, "id": prompt}
+        for prompt in ("first", "second")
+    ]
+    state = {
+        "messages": [HumanMessage(content="x"), AIMessage(content="", tool_calls=calls)]
+    }
+    await graph.ainvoke(state, config)
+    await graph.ainvoke(Command(resume="questions"), config)
+    await graph.ainvoke(Command(resume="test"), config)
+
+    assert sorted(visited) == ["ask_questions_node", "test_prompt"]
@@ -0,0 +1,33 @@
+"""Tests for streaming the questions of ask_questions_tool."""
+
+from src.graphs.clarify_graph import Question as ClarifyQuestion
+from src.shared.tool_stream import QuestionStreamParser
+
+ARGS = (
+    '{"questions": [{"question": "Which tone?", "options": ["formal", "casual"]}, '
+    '{"question": "Who is the audience?"}]}'
+)
+
+
+def feed_in_fragments(parser: QuestionStreamParser, text: str, size: int = 7):
+    questions = []
+    for start in range(0, len(text), size):
+        questions += parser.feed(text[start : start + size])
+    return questions
+
+
+def test_questions_are_parsed_as_they_complete():
+    parser = QuestionStreamParser()
+
+    assert parser.feed(ARGS[:60]) == []
+    assert parser.feed(ARGS[60:]) == [
+        {"question": "Which tone?", "options": ["formal", "casual"]},
+        {"question": "Who is the audience?", "options": None},
+    ]
+
+
+def test_questions_follow_the_graph_question_model():
+    # The clarify graph requires options, so the open question is not emitted
+    questions = feed_in_fragments(QuestionStreamParser(ClarifyQuestion), ARGS)
+
+    assert questions == [{"question": "Which tone?", "options": ["formal", "casual"]}]
@@ -0,0 +1,133 @@
+"""Tests for token usage accounting on the batch and optimization paths."""
+
+from types import SimpleNamespace
+
+import pytest
+from fastapi.testclient import TestClient
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from src.shared.batch import run_prompt_batch
+from src.shared.optimizer import OptimizationJob, run_optimization
+from src.shared.usage import (
+    LEDGER,
+    TokenBudgetExceeded,
+    UsageLedger,
+    check_budget,
+    thread_config,
+    thread_key,
+)
+
+USAGE = {"input_tokens": 10, "output_tokens": 5, "total_tokens": 15}
+
+
+class UsageModel(BaseChatModel):
+    """Chat model reporting a fixed usage for every call."""
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        message = AIMessage(
+            content="ok",
+            tool_calls=[
+                {"name": "judge_result_tool", "args": {"score": 3, "feedback": "more"}, "id": "1"}
+            ],
+            usage_metadata=USAGE,
+        )
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    @property
+    def _llm_type(self) -> str:
+        return "usage-model"
+
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+
+class PromptGraph:
+    """Graph calling the model once per run and pausing at a test result."""
+
+    def __init__(self, llm):
+        self.llm = llm
+
+    async def ainvoke(self, graph_input, config):
+        await self.llm.ainvoke("run the prompt", config)
+
+    async def aget_state(self, config):
+        return SimpleNamespace(
+            interrupts=[SimpleNamespace(value={"result": "a result"})],
+            values={"prompt": AIMessage(content="a prompt")},
+        )
+
+
+@pytest.fixture
+def tenant(request):
+    tenant_id = f"tenant-{request.node.name}"
+    yield tenant_id
+    LEDGER.tenants.pop(tenant_id, None)
+
+
+async def test_batch_records_tenant_usage(tenant):
+    config = thread_config("batch-test", tenant)
+    results = [
+        result
+        async for result in run_prompt_batch(UsageModel(), ["a", "b"], config=config)
+    ]
+
+    assert all("result" in result for result in results)
+    assert LEDGER.tenants[tenant]["total_tokens"] == 30
+
+
+def test_batch_endpoint_rejects_tenant_over_budget(monkeypatch, tenant):
+    from src.main import app
+
+    monkeypatch.setattr(LEDGER, "tenant_budget", 10)
+    LEDGER.tenants[tenant]["total_tokens"] = 10
+
+    response = TestClient(app).post(
+        "/batch/test", json={"prompts": ["a"]}, headers={"X-Tenant-ID": tenant}
+    )
+
+    assert response.status_code == 429
+
+
+async def test_optimization_records_usage_and_stops_at_budget(monkeypatch, tenant):
+    monkeypatch.setattr(LEDGER, "tenant_budget", 40)
+    llm = UsageModel()
+    job = OptimizationJob(goal="a goal", tenant_id=tenant)
+
+    await run_optimization(PromptGraph(llm), llm, job)
+
+    # Run, judge, run: the next call is refused at 45 tokens
+    assert job.stop_reason == "budget_exceeded"
+    assert LEDGER.tenants[tenant]["total_tokens"] == 45
+    assert len(job.iterations) == 1
+
+
+async def test_graphs_sharing_a_thread_id_have_separate_budgets(monkeypatch, tenant):
+    monkeypatch.setattr(LEDGER, "thread_budget", 15)
+    main = thread_config("shared-thread", tenant, "main")
+    basic = thread_config("shared-thread", tenant, "basic")
+
+    await UsageModel().ainvoke("hello", main)
+
+    assert LEDGER.threads[thread_key("shared-thread", "main")]["total_tokens"] == 15
+    with pytest.raises(TokenBudgetExceeded):
+        check_budget(main)
+    check_budget(basic)
+
+    for graph_name in ("main", "basic"):
+        LEDGER.threads.pop(thread_key("shared-thread", graph_name), None)
+
+
+def test_ledger_dump_and_load_round_trip():
+    ledger = UsageLedger()
+    ledger.record(thread_key("t1", "main"), "acme", USAGE)
+    ledger.record(thread_key("t1", "main"), "acme", USAGE)
+
+    restored = UsageLedger()
+    restored.load(ledger.dump())
+
+    assert restored.dump() == ledger.dump()
+    assert restored.threads["main:t1"]["total_tokens"] == 30
+    # Totals keep counting after a restore
+    restored.record("main:t1", "acme", USAGE)
+    assert restored.tenants["acme"]["calls"] == 3
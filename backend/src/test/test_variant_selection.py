@@ -0,0 +1,55 @@
+"""Tests for picking a prompt variant with a "select:<n>" resume."""
+
+from typing import Any
+
+import pytest
+from langgraph.checkpoint.memory import InMemorySaver
+from langgraph.graph import START, StateGraph
+from langgraph.types import Command
+from src.shared.utils import create_prompt_tool, selected_variant_index
+from typing_extensions import TypedDict
+
+VARIANTS = [{"prompt": "first"}, {"prompt": "second"}]
+
+
+class State(TypedDict, total=False):
+    result: Any
+
+
+def create_prompt(state: State):
+    command = create_prompt_tool.func(
+        prompt="draft", last_message=None, variants=VARIANTS
+    )
+    return {"result": command.update["prompt"].content}
+
+
+@pytest.mark.parametrize(
+    "next_step, expected",
+    [
+        ("select:0", 0),
+        ("select:1", 1),
+        ("select:2", None),
+        ("select:-1", None),
+        ("select:x", None),
+        ("select:", None),
+    ],
+)
+def test_selected_variant_index(next_step, expected):
+    assert selected_variant_index(next_step, VARIANTS) == expected
+
+
+async def test_invalid_selection_interrupts_again():
+    builder = StateGraph(State)
+    builder.add_node("create_prompt", create_prompt)
+    builder.add_edge(START, "create_prompt")
+    graph = builder.compile(checkpointer=InMemorySaver())
+    config = {"configurable": {"thread_id": "variants"}}
+
+    await graph.ainvoke({}, config)
+    for invalid in ("select:9", "select:-1", "select:x"):
+        await graph.ainvoke(Command(resume=invalid), config)
+        snapshot = await graph.aget_state(config)
+        assert snapshot.interrupts[0].value["variants"] == VARIANTS
+
+    result = await graph.ainvoke(Command(resume="select:1"), config)
+    assert result["result"] == "second"
@@ -0,0 +1,125 @@
+"""Tests for the per-thread WebSocket endpoint."""
+
+import asyncio
+import json
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from langgraph.types import Command
+from src.routers import graph_router
+from src.shared.streaming import run_graph_websocket
+from starlette.websockets import WebSocket
+
+
+class FakeGraph:
+    """Graph echoing its input as one update, recording what it was run with."""
+
+    def __init__(self, updates: int = 1, delay: float = 0):
+        self.updates = updates
+        self.delay = delay
+        self.inputs = []
+        self.cancelled = False
+
+    async def astream(self, graph_input, config, stream_mode=None):
+        self.inputs.append(graph_input)
+        if graph_input is None:
+            echo = "retry"
+        elif isinstance(graph_input, Command):
+            echo = graph_input.resume
+        else:
+            echo = graph_input["messages"][0]["content"]
+        try:
+            for idx in range(self.updates):
+                await asyncio.sleep(self.delay)
+                yield ("updates", {"node": {"result": f"{echo} {idx}"}})
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+
+
+@pytest.fixture
+def graph(monkeypatch):
+    graph = FakeGraph()
+    monkeypatch.setattr(graph_router, "get_graph", lambda name: graph)
+    return graph
+
+
+@pytest.fixture
+def websocket(graph):
+    app = FastAPI()
+    app.include_router(graph_router.create_graph_router("socket"))
+    with TestClient(app).websocket_connect("/graphs/socket/threads/t1/ws") as ws:
+        yield ws
+
+
+def _receive_until_done(websocket) -> list[dict]:
+    events = []
+    while True:
+        event = websocket.receive_json()
+        events.append(event)
+        if isinstance(event, dict) and event.get("type") in ("done", "error"):
+            return events
+
+
+def test_stream_then_resume(websocket, graph):
+    websocket.send_json({"type": "stream", "input": "hello"})
+    events = _receive_until_done(websocket)
+    assert events[0] == ["updates", {"node": {"result": "hello 0"}}]
+    assert events[-1] == {"type": "done"}
+
+    websocket.send_json({"type": "resume", "resume": "test"})
+    assert _receive_until_done(websocket)[0] == [
+        "updates",
+        {"node": {"result": "test 0"}},
+    ]
+    assert graph.inputs[1].resume == "test"
+
+
+@pytest.mark.parametrize(
+    "message",
+    [
+        "not json",
+        json.dumps({"type": "unknown"}),
+        json.dumps({"type": "stream"}),
+        json.dumps({"type": "resume", "resume": {"answers": [1, 2]}}),
+        json.dumps({"type": "stream", "input": 42}),
+    ],
+)
+def test_bad_message_keeps_the_connection(websocket, graph, message):
+    websocket.send_text(message)
+    assert websocket.receive_json()["type"] == "error"
+    assert graph.inputs == []
+
+    # The connection still serves the next valid message
+    websocket.send_json({"type": "retry"})
+    assert _receive_until_done(websocket)[-1] == {"type": "done"}
+
+
+async def test_disconnect_mid_run_stops_the_graph():
+    graph = FakeGraph(updates=100, delay=0.01)
+    sent = []
+    incoming = [
+        {"type": "websocket.connect"},
+        {"type": "websocket.receive", "text": json.dumps({"type": "stream", "input": "x"})},
+    ]
+
+    async def receive():
+        if incoming:
+            return incoming.pop(0)
+        await asyncio.sleep(10)
+
+    async def send(message):
+        if message["type"] == "websocket.send" and sent:
+            raise OSError("client disconnected")
+        if message["type"] == "websocket.send":
+            sent.append(message["text"])
+
+    scope = {"type": "websocket", "path": "/ws", "headers": [], "query_string": b""}
+    await asyncio.wait_for(
+        run_graph_websocket(WebSocket(scope, receive, send), graph, "t1"), 1
+    )
+    await asyncio.sleep(0)
+
+    assert len(sent) == 1
+    assert graph.cancelled